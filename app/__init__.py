@@ -1,29 +0,0 @@
-from flask import Flask
-from flask_sqlalchemy import SQLAlchemy
-from flask_login import LoginManager
-from config import Config
-
-db = SQLAlchemy()
-login_manager = LoginManager()
-
-def create_app(config_class=Config):
-    app = Flask(__name__)
-    app.config.from_object(config_class)
-
-    # Security headers middleware
-    @app.after_request
-    def add_security_headers(response):
-        response.headers['Strict-Transport-Security'] = 'max-age=31536000'  # 1 year
-        response.headers['X-Content-Type-Options'] = 'nosniff'
-        return response
-
-    db.init_app(app)
-    login_manager.init_app(app)
-    login_manager.login_view = 'auth.login'
-
-    from app.routes import main
-    from app.auth import auth
-    app.register_blueprint(main)
-    app.register_blueprint(auth)
-
-    return app
\ No newline at end of file
@@ -1,52 +1,233 @@
-from flask import Blueprint, render_template, redirect, url_for, flash
-from flask_login import LoginManager, login_user, logout_user, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
-from .database import get_db
-from .models import User
-from .forms import LoginForm
-
-auth = Blueprint('auth', __name__)
-login_manager = LoginManager()
-
-def init_auth(app):
-    login_manager.init_app(app)
-    login_manager.login_view = 'auth.login'
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+import bcrypt
+from fastapi import Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models import User, Video
+from app.utils.ttl_cache import TTLCache
+
+SECRET_KEY = os.getenv("SECRET_KEY")
+if not SECRET_KEY:
+    SECRET_KEY = secrets.token_urlsafe(32)
+    print("Warning: SECRET_KEY not set. Sessions will not survive restarts or be shared between workers.")
+
+SESSION_COOKIE = "session"
+SESSION_TTL = 24 * 60 * 60  # 1 day
+REMEMBER_TTL = 30 * 24 * 60 * 60  # 30 days
+
+# Lookups cached per process so authenticated requests (and every range
+# request while scrubbing video) don't hit users/videos. Video ownership
+# and filenames never change after upload, so they can be cached longer.
+# The app never modifies users either; changes made directly in the database
+# (e.g. deactivating an account) apply once the cached entry expires.
+_user_cache = TTLCache(ttl=60)
+_video_cache = TTLCache(ttl=600)
+
+_dummy_hash = None
+
+
+class LoginRequired(Exception):
+    """Raised by page routes when there is no signed-in user"""
+
+
+@dataclass(frozen=True)
+class SessionUser:
+    id: int
+    email: str
+    is_active: bool
+    created_at: Optional[datetime]
+
+
+@dataclass(frozen=True)
+class VideoAccess:
+    id: int
+    user_id: Optional[int]
+    filename: str
+
+
+# Password hashing. bcrypt is deliberately slow, so the async helpers run
+# it in the thread pool instead of blocking the event loop.
+
+def hash_password(password: str) -> str:
+    # bcrypt only uses the first 72 bytes
+    return bcrypt.hashpw(password.encode()[:72], bcrypt.gensalt()).decode()
+
+
+def verify_password(password: str, password_hash: Optional[str]) -> bool:
+    if not password_hash:
+        return False
+    try:
+        return bcrypt.checkpw(password.encode()[:72], password_hash.encode())
+    except ValueError:
+        return False
+
+
+async def hash_password_async(password: str) -> str:
+    return await run_in_threadpool(hash_password, password)
+
+
+async def verify_password_async(password: str, password_hash: Optional[str]) -> bool:
+    return await run_in_threadpool(verify_password, password, password_hash)
+
+
+# Stateless session tokens: "<user_id>.<expires>.<signature>"
+
+def _sign(payload: str) -> str:
+    digest = hmac.new(SECRET_KEY.encode(), payload.encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+def create_session_token(user_id: int, ttl: int = SESSION_TTL) -> str:
+    payload = f"{user_id}.{int(time.time()) + ttl}"
+    return f"{payload}.{_sign(payload)}"
+
+
+def verify_session_token(token: Optional[str]) -> Optional[int]:
+    """
+    Return the user id from a valid, unexpired token, else None
+    No database access
+    """
+    if not token:
+        return None
+    try:
+        user_id, expires, signature = token.split(".")
+        # Compare bytes: compare_digest raises TypeError on non-ASCII str
+        if not hmac.compare_digest(signature.encode(), _sign(f"{user_id}.{expires}").encode()):
+            return None
+        if int(expires) < time.time():
+            return None
+        return int(user_id)
+    except ValueError:
+        return None
+
+
+def get_request_token(request: Request) -> Optional[str]:
+    """
+    Session token from an Authorization: Bearer header or the session cookie
+    """
+    authorization = request.headers.get("authorization", "")
+    scheme, _, credentials = authorization.partition(" ")
+    if scheme.lower() == "bearer" and credentials:
+        return credentials.strip()
+    return request.cookies.get(SESSION_COOKIE)
+
+
+def set_session_cookie(response, request: Request, user_id: int, remember: bool = False):
+    ttl = REMEMBER_TTL if remember else SESSION_TTL
+    response.set_cookie(
+        SESSION_COOKIE,
+        create_session_token(user_id, ttl),
+        max_age=ttl if remember else None,
+        httponly=True,
+        samesite="lax",
+        secure=request.url.scheme == "https"
+    )
+
+
+def clear_session_cookie(response):
+    response.delete_cookie(SESSION_COOKIE)
+
+
+# Cached lookups
+
+def load_session_user(db: Session, user_id: int) -> Optional[SessionUser]:
+    def load():
+        user = db.query(User).filter(User.id == user_id).first()
+        if not user:
+            return None
+        return SessionUser(id=user.id, email=user.email, is_active=user.is_active, created_at=user.created_at)
+
+    return _user_cache.get_or_load(user_id, load)
+
+
+def get_video_access(db: Session, video_id: int) -> Optional[VideoAccess]:
+    def load():
+        video = db.query(Video.id, Video.user_id, Video.filename).filter(Video.id == video_id).first()
+        if not video:
+            return None
+        return VideoAccess(id=video.id, user_id=video.user_id, filename=video.filename)
+
+    return _video_cache.get_or_load(video_id, load)
+
+
+# FastAPI dependencies
+
+def get_current_user(request: Request, db: Session = Depends(get_db)) -> Optional[SessionUser]:
+    user_id = verify_session_token(get_request_token(request))
+    if user_id is None:
+        return None
+    user = load_session_user(db, user_id)
+    if not user or not user.is_active:
+        return None
+    return user
+
+
+def require_user(user: Optional[SessionUser] = Depends(get_current_user)) -> SessionUser:
+    """For API routes: 401 without a signed-in user"""
+    if not user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    return user
+
+
+def require_page_user(user: Optional[SessionUser] = Depends(get_current_user)) -> SessionUser:
+    """For HTML routes: redirect to the login page without a signed-in user"""
+    if not user:
+        raise LoginRequired()
+    return user
+
+
+def require_video_owner(video_id: int, db: Session, user: SessionUser) -> VideoAccess:
+    """
+    Check the user owns the video using the cached ownership lookup
+    Raises 404 for missing videos and 403 for other users' videos
+    """
+    video = get_video_access(db, video_id)
+    if not video:
+        raise HTTPException(status_code=404, detail="Video not found")
+    if video.user_id != user.id:
+        raise HTTPException(status_code=403, detail="Not authorized to access this video")
+    return video
+
+
+# Account management
+
+# Both functions end the session's transaction before awaiting bcrypt, which
+# returns the connection to the pool. Otherwise a burst of sign-ins holds every
+# pooled connection while hashing, and the next checkout blocks the event loop.
+
+async def authenticate(db: Session, email: str, password: str) -> Optional[SessionUser]:
+    global _dummy_hash
+    user = db.query(User).filter(User.email == email).first()
+    session_user = None if user is None else SessionUser(id=user.id, email=user.email, is_active=user.is_active, created_at=user.created_at)
+    password_hash = user.password_hash if user else None
+    db.rollback()
     
-    @login_manager.user_loader
-    def load_user(user_id):
-        db = get_db()
-        return db.query(User).get(int(user_id))
-
-@auth.route('/login', methods=['GET', 'POST'])
-def login():
-    if current_user.is_authenticated:
-        return redirect(url_for('main.index'))
-        
-    form = LoginForm()
-    if form.validate_on_submit():
-        user = verify_user(form.email.data, form.password.data)
-        if user:
-            login_user(user, remember=form.remember.data)
-            return redirect(url_for('main.index'))
-        flash('Invalid email or password')
-    return render_template('auth/login.html', form=form)
-
-@auth.route('/logout')
-def logout():
-    logout_user()
-    return redirect(url_for('main.index'))
-
-def create_user(email, password):
-    db = get_db()
-    user = User(email=email)
-    user.set_password(password)
+    if not session_user:
+        # Spend the same time as a real check so response timing doesn't reveal accounts
+        if _dummy_hash is None:
+            _dummy_hash = await hash_password_async(secrets.token_urlsafe(16))
+        await verify_password_async(password, _dummy_hash)
+        return None
+    if not session_user.is_active or not await verify_password_async(password, password_hash):
+        return None
+    return session_user
+
+
+async def create_user(db: Session, email: str, password: str) -> User:
+    db.rollback()
+    user = User(email=email, password_hash=await hash_password_async(password))
     db.add(user)
     db.commit()
+    db.refresh(user)
     return user
-
-def verify_user(email, password):
-    db = get_db()
-    user = db.query(User).filter_by(email=email).first()
-    if user and check_password_hash(user.password_hash, password):
-        return user
-    return None
\ No newline at end of file
@@ -1,17 +1,28 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, literal, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
 
 # Database configuration
-DATABASE_URL = "sqlite:///./database.db"
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./database.db")
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
 
 # Create engine
 engine = create_engine(
     DATABASE_URL, 
-    connect_args={"check_same_thread": False}  # Needed for SQLite
+    connect_args={"check_same_thread": False, "timeout": 30} if IS_SQLITE else {}  # Needed for SQLite
 )
 
+if IS_SQLITE:
+    @event.listens_for(engine, "connect")
+    def _configure_sqlite(dbapi_connection, connection_record):
+        # WAL lets readers run alongside a writer, and busy_timeout makes concurrent
+        # writers from other worker processes wait instead of failing with "database is locked"
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA busy_timeout=30000")
+        cursor.close()
+
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -26,6 +37,118 @@ def get_db():
     finally:
         db.close()
 
+# Notes left empty don't count towards note totals
+_NOTE_HAS_CONTENT = "notes.content IS NOT NULL AND TRIM(notes.content) != ''"
+
+_NOTE_RECOUNTS = [
+    f"UPDATE videos SET note_count = (SELECT COUNT(*) FROM notes WHERE notes.video_id = videos.id AND {_NOTE_HAS_CONTENT})",
+    (
+        "UPDATE users SET note_count = (SELECT COUNT(*) FROM notes JOIN videos ON videos.id = notes.video_id "
+        f"WHERE videos.user_id = users.id AND {_NOTE_HAS_CONTENT})"
+    ),
+    "UPDATE recording_metrics SET note_count = (SELECT note_count FROM videos WHERE videos.id = recording_metrics.video_id)",
+    (
+        "UPDATE trend_rollups SET note_count = (SELECT COALESCE(SUM(note_count), 0) FROM recording_metrics "
+        "WHERE recording_metrics.user_id = trend_rollups.user_id "
+        "AND recording_metrics.period_start = trend_rollups.period_start)"
+    ),
+]
+
+# Columns added to existing tables, with how to fill them in from existing rows
+_BACKFILLS = {
+    ("videos", "note_count"): _NOTE_RECOUNTS[0],
+    ("users", "video_count"): "UPDATE users SET video_count = (SELECT COUNT(*) FROM videos WHERE videos.user_id = users.id)",
+    ("users", "completed_video_count"): (
+        "UPDATE users SET completed_video_count = "
+        "(SELECT COUNT(*) FROM videos WHERE videos.user_id = users.id AND videos.status = 'completed')"
+    ),
+    ("users", "total_duration"): (
+        "UPDATE users SET total_duration = (SELECT COALESCE(SUM(duration), 0) FROM videos "
+        "WHERE videos.user_id = users.id AND videos.status = 'completed')"
+    ),
+    ("users", "note_count"): _NOTE_RECOUNTS[1],
+}
+
+# The first prompt seeded with a note's view_type and order_index
+_KEPT_PROMPT = (
+    "(SELECT MIN(kept.id) FROM prompts kept JOIN prompts seeded "
+    "ON kept.view_type = seeded.view_type AND kept.order_index = seeded.order_index "
+    "WHERE seeded.id = notes.prompt_id)"
+)
+
+# Unique indexes added to existing tables: rows to remove first, and what to recount after
+_INDEX_CLEANUPS = {
+    # Keep the first of any prompts seeded twice by concurrent startups, moving
+    # their notes over unless the video already has a note for the kept prompt
+    "uq_prompts_view_order": (
+        [
+            f"UPDATE notes SET prompt_id = {_KEPT_PROMPT} WHERE prompt_id != {_KEPT_PROMPT} AND NOT EXISTS "
+            f"(SELECT 1 FROM notes other WHERE other.video_id = notes.video_id AND other.prompt_id = {_KEPT_PROMPT})",
+            f"DELETE FROM notes WHERE prompt_id != {_KEPT_PROMPT}",
+            "DELETE FROM prompts WHERE view_type IS NOT NULL AND order_index IS NOT NULL AND id NOT IN "
+            "(SELECT MIN(id) FROM prompts GROUP BY view_type, order_index)",
+        ],
+        _NOTE_RECOUNTS,
+    ),
+    # Keep the latest of any duplicate notes saved before the index existed
+    "uq_notes_video_prompt": (
+        ["DELETE FROM notes WHERE id NOT IN (SELECT MAX(id) FROM notes GROUP BY video_id, prompt_id)"],
+        _NOTE_RECOUNTS,
+    ),
+}
+
+def _column_ddl(column, dialect) -> str:
+    ddl = f"{dialect.identifier_preparer.quote(column.name)} {column.type.compile(dialect=dialect)}"
+    # Only constant defaults can be added to existing rows
+    if column.default is not None and column.default.is_scalar:
+        default = literal(column.default.arg).compile(dialect=dialect, compile_kwargs={"literal_binds": True})
+        ddl += f" DEFAULT {default}"
+        if not column.nullable:
+            ddl += " NOT NULL"
+    return ddl
+
+def migrate_schema(bind=engine):
+    """
+    Add columns and indexes that models gained after their tables were created
+    create_all() skips existing tables, so older databases need this
+    Safe to call on every startup
+    """
+    backfills = []
+    with bind.begin() as conn:
+        inspector = inspect(conn)
+        existing_tables = set(inspector.get_table_names())
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+            existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            # Formerly declared as constraints on some databases
+            existing_indexes |= {constraint["name"] for constraint in inspector.get_unique_constraints(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {_column_ddl(column, conn.dialect)}"))
+                print(f"Added column {table.name}.{column.name}")
+                if (table.name, column.name) in _BACKFILLS:
+                    backfills.append(_BACKFILLS[(table.name, column.name)])
+            for index in table.indexes:
+                if index.name in existing_indexes:
+                    continue
+                if index.name in _INDEX_CLEANUPS:
+                    cleanups, recounts = _INDEX_CLEANUPS[index.name]
+                    for statement in cleanups:
+                        conn.execute(text(statement))
+                    backfills.extend(recounts)
+                index.create(conn)
+                print(f"Added index {index.name}")
+        # After every ALTER, since backfills read columns of other tables
+        for statement in backfills:
+            conn.execute(text(statement))
+
 # Create tables
 def create_tables():
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    from app.utils.search import create_search_indexes
+    Base.metadata.create_all(bind=engine)
+    # Before the search setup, whose triggers read videos.transcript
+    migrate_schema(engine)
+    create_search_indexes(engine)
\ No newline at end of file
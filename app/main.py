@@ -1,34 +1,112 @@
-from fastapi import FastAPI, Request, Depends, HTTPException, UploadFile, File, Form
-from fastapi.responses import HTMLResponse, RedirectResponse, FileResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, Request, Depends, HTTPException, UploadFile, File, Form, BackgroundTasks
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, select_autoescape
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+import asyncio
 import os
+import tempfile
 import uuid
-from typing import List
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from typing import List, Optional
 
-from app.database import get_db, create_tables
-from app.models import Video, Note, Prompt
-from app.utils.file_validation import validate_video_file, check_file_size
-from app.utils.video_processing import process_video
+from app.database import get_db, create_tables, SessionLocal
+from app.models import User, Video, Note, Prompt, FrameTimeline, RecordingMetrics
+from app.auth import (
+    SessionUser, LoginRequired, get_current_user, require_user, require_page_user,
+    require_video_owner, authenticate, create_user, set_session_cookie, clear_session_cookie
+)
+from app.utils.file_validation import validate_video_file, check_upload_size, MAX_FILE_SIZE
+from app.utils.storage import (
+    get_storage, get_cache, upload_key, parse_range_header, LimitedReader,
+    StorageError, ObjectNotFound
+)
+from app.utils.video_processing import process_video, extract_audio_features, compute_audio_metrics, stored_waveform
+from app.utils.frame_analysis import analyze_video_frames
+from app.utils.stages import file_fingerprint, file_lock
+from app.utils.processing_lock import (
+    claim_video, renew_claim, release_video, find_stalled_videos,
+    PROCESSING_LOCK_RENEW_INTERVAL
+)
+from app.utils.workers import get_process_pool, shutdown_process_pool
+from app.utils.progress import get_broker, format_sse, TERMINAL_STAGES
+from app.utils.dashboard import (
+    list_user_videos, serialize_video, get_profile_stats,
+    record_video_uploaded, record_video_completed, record_note_added,
+    note_has_content, DEFAULT_PAGE_SIZE
+)
+from app.utils.trends import record_recording_metrics, record_note_for_trends, get_trend_series
+from app.utils.search import search_notes, DEFAULT_SEARCH_LIMIT
+from app.utils.http_cache import (
+    AssetManifest, CachedStaticFiles, compute_build_id, page_etag, not_modified,
+    PRIVATE_REVALIDATE_CACHE_CONTROL
+)
 
 # Create FastAPI app
 app = FastAPI(title="Public Speaking Coach", version="1.0.0")
 
-# Mount static files
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+# Mount static files; fingerprinted URLs from static_url() are cached forever
+asset_manifest = AssetManifest("app/static")
+app.mount("/static", CachedStaticFiles(directory="app/static", manifest=asset_manifest), name="static")
 
-# Templates
-templates = Jinja2Templates(directory="app/templates")
+# Templates, with compiled bytecode cached on disk and shared across workers.
+# Set TEMPLATE_AUTO_RELOAD=0 in production to skip per-render mtime checks.
+template_cache_dir = os.getenv("TEMPLATE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "psc-jinja-cache"))
+os.makedirs(template_cache_dir, exist_ok=True)
+templates = Jinja2Templates(env=Environment(
+    loader=FileSystemLoader("app/templates"),
+    autoescape=select_autoescape(),
+    bytecode_cache=FileSystemBytecodeCache(template_cache_dir),
+    auto_reload=os.getenv("TEMPLATE_AUTO_RELOAD", "1") != "0"
+))
+templates.env.globals["static_url"] = asset_manifest.url
+
+# Changes whenever templates or static assets change, so deploys invalidate page ETags
+build_id = compute_build_id("app/templates", asset_manifest)
+
+@app.exception_handler(LoginRequired)
+async def login_required_handler(request: Request, exc: LoginRequired):
+    """Send signed-out visitors of HTML pages to the login page"""
+    return RedirectResponse(url="/login", status_code=302)
 
 # Create database tables on startup
 @app.on_event("startup")
 async def startup_event():
-    create_tables()
-    # Initialize default prompts if they don't exist
-    db = next(get_db())
-    if db.query(Prompt).count() == 0:
-        init_prompts(db)
+    await run_in_threadpool(initialize_database)
+    app.state.processing_sweep = asyncio.create_task(sweep_stalled_processing())
+
+# Every worker process runs startup; this lock makes them take turns
+STARTUP_LOCK_PATH = os.path.join(tempfile.gettempdir(), "psc-startup.lock")
+
+def initialize_database():
+    """
+    Create tables and seed the default prompts exactly once
+    The file lock serializes workers on this host; the unique index on
+    prompts covers replicas on other hosts sharing the database
+    """
+    with file_lock(STARTUP_LOCK_PATH):
+        create_tables()
+        db = SessionLocal()
+        try:
+            # Initialize default prompts if they don't exist
+            if db.query(Prompt).count() == 0:
+                init_prompts(db)
+        except IntegrityError:
+            db.rollback()
+            print("Default prompts were seeded by another worker")
+        finally:
+            db.close()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    sweep = getattr(app.state, "processing_sweep", None)
+    if sweep:
+        sweep.cancel()
+    shutdown_process_pool()
 
 def init_prompts(db: Session):
     """Initialize default prompts for each view type"""
@@ -59,34 +137,305 @@ async def landing(request: Request):
     """Landing page for new visitors"""
     return templates.TemplateResponse("landing.html", {"request": request})
 
+@app.get("/login", response_class=HTMLResponse)
+async def login_page(request: Request, user: Optional[SessionUser] = Depends(get_current_user)):
+    """Login form"""
+    if user:
+        return RedirectResponse(url="/app", status_code=303)
+    return templates.TemplateResponse("auth/login.html", {"request": request, "error": None, "email": ""})
+
+@app.post("/login")
+async def login(
+    request: Request,
+    email: str = Form(...),
+    password: str = Form(...),
+    remember: bool = Form(False),
+    db: Session = Depends(get_db)
+):
+    """Check credentials and start a session"""
+    user = await authenticate(db, email.strip().lower(), password)
+    if not user:
+        return templates.TemplateResponse(
+            "auth/login.html",
+            {"request": request, "error": "Invalid email or password", "email": email},
+            status_code=400
+        )
+    
+    response = RedirectResponse(url="/app", status_code=303)
+    set_session_cookie(response, request, user.id, remember=remember)
+    return response
+
+@app.get("/register", response_class=HTMLResponse)
+async def register_page(request: Request):
+    """Registration form"""
+    return templates.TemplateResponse("auth/register.html", {"request": request, "error": None, "email": ""})
+
+@app.post("/register")
+async def register(
+    request: Request,
+    email: str = Form(...),
+    password: str = Form(...),
+    confirm_password: str = Form(...),
+    db: Session = Depends(get_db)
+):
+    """Create an account and start a session"""
+    email = email.strip().lower()
+    error = None
+    if "@" not in email:
+        error = "Please enter a valid email address"
+    elif len(password) < 8:
+        error = "Password must be at least 8 characters"
+    elif password != confirm_password:
+        error = "Passwords do not match"
+    elif db.query(User.id).filter(User.email == email).first():
+        error = "An account with this email already exists"
+    
+    if error:
+        return templates.TemplateResponse(
+            "auth/register.html",
+            {"request": request, "error": error, "email": email},
+            status_code=400
+        )
+    
+    user = await create_user(db, email, password)
+    response = RedirectResponse(url="/app", status_code=303)
+    set_session_cookie(response, request, user.id)
+    return response
+
+@app.get("/logout")
+async def logout():
+    """End the session"""
+    response = RedirectResponse(url="/", status_code=303)
+    clear_session_cookie(response)
+    return response
+
 @app.get("/app", response_class=HTMLResponse)
-async def homepage(request: Request):
+async def homepage(request: Request, current_user: SessionUser = Depends(require_page_user)):
     """Main application dashboard"""
-    if not current_user.is_authenticated:
-        return RedirectResponse(url="/login")
-    return templates.TemplateResponse("index.html", {"request": request})
+    return templates.TemplateResponse("index.html", {"request": request, "current_user": current_user})
 
 @app.get("/profile", response_class=HTMLResponse)
-@login_required
-async def profile(request: Request, db: Session = Depends(get_db)):
+async def profile(
+    request: Request,
+    cursor: str = None,
+    db: Session = Depends(get_db),
+    current_user: SessionUser = Depends(require_page_user)
+):
     """User profile page"""
-    video_count = db.query(Video).filter(Video.user_id == current_user.id).count()
-    note_count = db.query(Note).join(Video).filter(Video.user_id == current_user.id).count()
+    stats = get_profile_stats(db, current_user.id)
+    try:
+        page = list_user_videos(db, current_user.id, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     return templates.TemplateResponse(
         "profile.html",
         {
             "request": request,
-            "video_count": video_count,
-            "note_count": note_count
+            "current_user": current_user,
+            "video_count": stats["video_count"],
+            "note_count": stats["note_count"],
+            "stats": stats,
+            "videos": page["videos"],
+            "next_cursor": page["next_cursor"]
         }
     )
 
+@app.get("/dashboard/videos")
+async def dashboard_videos(
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: str = None,
+    db: Session = Depends(get_db),
+    current_user: SessionUser = Depends(require_user)
+):
+    """Paginated listing of the current user's videos, newest first"""
+    try:
+        page = list_user_videos(db, current_user.id, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {
+        "videos": [serialize_video(video) for video in page["videos"]],
+        "next_cursor": page["next_cursor"]
+    }
+
+def bump_video_version(db: Session, video_id: int):
+    """Invalidate cached analysis/report pages for a video"""
+    db.query(Video).filter(Video.id == video_id).update(
+        {Video.version: Video.version + 1},
+        synchronize_session=False
+    )
+
+def upsert_note(db: Session, video_id: int, prompt_id: int, view_type: str, content: str):
+    """Insert the note for a prompt, or update its content if it exists"""
+    insert = postgresql_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    statement = insert(Note).values(video_id=video_id, prompt_id=prompt_id, view_type=view_type, content=content)
+    db.execute(statement.on_conflict_do_update(
+        index_elements=[Note.video_id, Note.prompt_id],
+        set_={"content": statement.excluded.content}
+    ))
+
+def mark_video_completed(db: Session, video: Video, input_hash: str):
+    """
+    Mark a processed video completed, counting it towards profile stats once
+    input_hash is only set on completion; the conditional UPDATE lets just one
+    run count the video, even if a slow run and the one that took it over
+    both finish
+    """
+    first_completion = db.query(Video).filter(Video.id == video.id, Video.input_hash.is_(None)).update(
+        {Video.input_hash: input_hash},
+        synchronize_session=False
+    ) == 1
+    if first_completion:
+        record_video_completed(db, video)
+    video.status = "completed"
+    video.input_hash = input_hash
+
+class ClaimLost(Exception):
+    """The processing lock expired and another worker took the video over"""
+
+def run_processing(video_id: int, key: str):
+    """
+    Run the processing pipeline for a video, publishing progress as each stage finishes
+    Safe to run again for the same video: one worker at a time holds the
+    video's lock, and stages whose artifacts are up to date are skipped
+    """
+    broker = get_broker()
+    db = SessionLocal()
+    owner = uuid.uuid4().hex
+    try:
+        if not claim_video(db, video_id, owner):
+            print(f"Video {video_id} is already being processed")
+            return
+        
+        video = db.query(Video).filter(Video.id == video_id).first()
+        if not video:
+            return
+        
+        def progress(stage, percent, data=None):
+            broker.publish(video_id, stage, percent, data)
+        
+        def keep_claim():
+            # Called between stages, when the session has nothing pending to commit
+            if not renew_claim(db, video_id, owner):
+                raise ClaimLost()
+        
+        def wait_for_frames():
+            while True:
+                try:
+                    return frames_future.result(timeout=PROCESSING_LOCK_RENEW_INTERVAL)
+                except FuturesTimeoutError:
+                    keep_claim()
+        
+        try:
+            progress("processing", 5)
+            # Fetched from storage once; every stage below reads the same local copy
+            file_path = get_cache().local_path(key)
+            input_hash = file_fingerprint(file_path)
+            
+            # Frame analysis is CPU-bound; run it in the process pool
+            # alongside the audio stages and collect it at the end.
+            # It is optional, so a failing pool must not fail the audio stages
+            try:
+                frames_future = get_process_pool().submit(analyze_video_frames, file_path, input_hash)
+            except Exception as frame_error:
+                frames_future = None
+                print(f"Frame analysis failed: {frame_error}")
+            duration = process_video(file_path, progress=progress, input_hash=input_hash)
+            if duration is not None:
+                video.duration = duration
+                bump_video_version(db, video_id)
+            db.commit()
+            keep_claim()
+            
+            audio = extract_audio_features(file_path, input_hash)
+            progress("waveform", 80, {"waveform": audio["waveform"], "duration": audio["duration"]})
+            keep_claim()
+            
+            metrics = compute_audio_metrics(file_path, input_hash=input_hash)
+            progress("metrics", 90, metrics)
+            keep_claim()
+            
+            try:
+                frames = wait_for_frames() if frames_future else None
+                if frames:
+                    db.merge(FrameTimeline(
+                        video_id=video_id,
+                        sample_rate=frames["sample_rate"],
+                        timeline=frames["timeline"],
+                        face_presence=frames["summary"]["face_presence"],
+                        mean_motion=frames["summary"]["mean_motion"]
+                    ))
+                    progress("frames", 95, frames["summary"])
+            except ClaimLost:
+                raise
+            except Exception as frame_error:
+                print(f"Frame analysis failed: {frame_error}")
+            
+            mark_video_completed(db, video, input_hash)
+            record_recording_metrics(db, video, metrics)
+            bump_video_version(db, video_id)
+            db.commit()
+            progress("completed", 100, {"duration": video.duration})
+        except ClaimLost:
+            # The worker that took over finishes the video and reports its progress
+            db.rollback()
+            print(f"Video {video_id} was taken over by another worker")
+        except Exception as e:
+            db.rollback()
+            video.status = "error"
+            bump_video_version(db, video_id)
+            db.commit()
+            print(f"Video processing error: {e}")
+            progress("error", 100, {"error": str(e)})
+        finally:
+            release_video(db, video_id, owner)
+    finally:
+        db.close()
+
+# Seconds between checks for videos whose processing stopped (crashed or restarted worker)
+PROCESSING_SWEEP_INTERVAL = int(os.getenv("PROCESSING_SWEEP_INTERVAL", "60"))
+
+def resume_stalled_processing():
+    """Re-run processing for videos left in "processing" by a worker that stopped"""
+    db = SessionLocal()
+    try:
+        stalled = find_stalled_videos(db)
+    finally:
+        db.close()
+    
+    # run_processing claims each video, so workers sweeping at the same time don't duplicate work
+    for video_id, filename in stalled:
+        print(f"Resuming processing for video {video_id}")
+        run_processing(video_id, upload_key(filename))
+
+async def sweep_stalled_processing():
+    while True:
+        await asyncio.sleep(PROCESSING_SWEEP_INTERVAL)
+        try:
+            await run_in_threadpool(resume_stalled_processing)
+        except Exception as e:
+            print(f"Processing sweep failed: {e}")
+
+@app.get("/trends")
+async def trends(
+    granularity: str = "week",
+    db: Session = Depends(get_db),
+    current_user: SessionUser = Depends(require_user)
+):
+    """Progress-over-time series across the current user's recordings"""
+    try:
+        return get_trend_series(db, current_user.id, granularity=granularity)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @app.post("/upload")
 async def upload_video(
     request: Request,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    current_user: SessionUser = Depends(require_user)
 ):
     """Handle video upload"""
     try:
@@ -95,71 +444,50 @@ async def upload_video(
         if not validation_result["valid"]:
             raise HTTPException(status_code=400, detail=validation_result["error"])
         
-        # Generate unique filename
-        # Ensure upload directory exists
-        upload_dir = "app/static/uploads"
-        os.makedirs(upload_dir, exist_ok=True)
+        # Validate file size before storing (the upload is already spooled to disk)
+        if file.size is not None:
+            size_validation = check_upload_size(file.size)
+            if not size_validation["valid"]:
+                raise HTTPException(status_code=400, detail=size_validation["error"])
         
+        # Generate unique filename
         file_extension = os.path.splitext(file.filename)[1]
         unique_filename = f"{uuid.uuid4()}{file_extension}"
-        file_path = os.path.join(upload_dir, unique_filename)
+        key = upload_key(unique_filename)
         
-        print(f"Attempting to save file to: {os.path.abspath(file_path)}")  # Debug logging
-        
-        # Read and validate file size
-        content = await file.read()
-        size_validation = check_file_size(content)
-        if not size_validation["valid"]:
-            raise HTTPException(status_code=400, detail=size_validation["error"])
-        
-        # Save file
+        # Stream to storage in chunks rather than reading the whole file into memory
+        storage = get_storage()
         try:
-            print(f"Attempting to write to: {file_path}")
-            print(f"Content size: {len(content)} bytes")
-            
-            with open(file_path, "wb") as buffer:
-                bytes_written = buffer.write(content)
-                print(f"Successfully wrote {bytes_written} bytes to {file_path}")
-                
-            # Verify file exists and has content
-            if os.path.exists(file_path):
-                file_size = os.path.getsize(file_path)
-                print(f"File verification: {file_path} exists with size {file_size} bytes")
-            else:
-                print(f"ERROR: File {file_path} was not created")
-                raise HTTPException(status_code=500, detail="File was not created on disk")
-                
-        except Exception as e:
+            reader = LimitedReader(file.file, MAX_FILE_SIZE)
+            file_size = await run_in_threadpool(storage.put_stream, key, reader)
+        except StorageError as e:
+            await run_in_threadpool(storage.delete, key)
             print(f"Error saving file: {type(e).__name__}: {e}")
-            print(f"Full path attempted: {os.path.abspath(file_path)}")
-            raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+            raise HTTPException(status_code=400 if reader.count > MAX_FILE_SIZE else 500, detail=f"Upload failed: {str(e)}")
         
         # Create video record
         video = Video(
             filename=unique_filename,
             original_name=file.filename,
-            file_size=len(content),
-            status="uploaded"
+            file_size=file_size,
+            status="processing",
+            user_id=current_user.id
         )
         db.add(video)
+        record_video_uploaded(db, video.user_id)
         db.commit()
         db.refresh(video)
         
-        # Process video in background (for now, just get duration)
-        try:
-            duration = process_video(file_path)
-            if duration is not None:
-                video.duration = duration
-            video.status = "completed"
-            db.commit()
-        except Exception as e:
-            video.status = "error"
-            db.commit()
-            print(f"Video processing error: {e}")
+        # Process video after the response is sent; progress is streamed
+        # to the analysis page via /analysis/{video_id}/events
+        get_broker().publish(video.id, "uploaded", 0)
+        background_tasks.add_task(run_processing, video.id, key)
         
         # Redirect to analysis page
         return RedirectResponse(url=f"/analysis/{video.id}", status_code=303)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
@@ -167,13 +495,21 @@ async def upload_video(
 async def analysis_page(
     request: Request,
     video_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    current_user: SessionUser = Depends(require_page_user)
 ):
     """Analysis page with three views"""
+    require_video_owner(video_id, db, current_user)
     video = db.query(Video).filter(Video.id == video_id).first()
     if not video:
         raise HTTPException(status_code=404, detail="Video not found")
     
+    # Skip the prompt/note queries and rendering if the client's copy is current
+    etag = page_etag(build_id, "analysis", video.id, video.version)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    
     # Get prompts for each view
     video_prompts = db.query(Prompt).filter(Prompt.view_type == "video", Prompt.active == True).order_by(Prompt.order_index).all()
     audio_prompts = db.query(Prompt).filter(Prompt.view_type == "audio", Prompt.active == True).order_by(Prompt.order_index).all()
@@ -189,53 +525,189 @@ async def analysis_page(
         "video_prompts": video_prompts,
         "audio_prompts": audio_prompts,
         "text_prompts": text_prompts,
-        "notes_by_prompt": notes_by_prompt
-    })
+        "notes_by_prompt": notes_by_prompt,
+        "transcript": video.transcript or "",
+        "results": load_video_results(db, video)
+    }, headers={"ETag": etag, "Cache-Control": PRIVATE_REVALIDATE_CACHE_CONTROL})
+
+# Seconds between keep-alives on the progress stream, each also re-checking the stored status
+PROGRESS_POLL_INTERVAL = 10
+
+def load_video_results(db: Session, video: Video) -> dict:
+    """
+    Stored results of a finished video, shaped like progress event data
+    Lets pages show them without the (per-process, bounded) progress history
+    """
+    results = {"duration": video.duration}
+    if video.status != "completed":
+        return results
+    
+    waveform = stored_waveform(video.input_hash) if video.input_hash else None
+    if waveform and waveform["waveform"]:
+        results["waveform"] = waveform["waveform"]
+    
+    metrics = db.query(RecordingMetrics).filter(RecordingMetrics.video_id == video.id).first()
+    if metrics:
+        results["metrics"] = {
+            "speaking_rate": metrics.speaking_rate,
+            "pause_ratio": metrics.pause_ratio,
+            "loudness_variance": metrics.loudness_variance
+        }
+    
+    frames = db.query(FrameTimeline.face_presence, FrameTimeline.mean_motion).filter(
+        FrameTimeline.video_id == video.id
+    ).first()
+    if frames:
+        results["frames"] = {"face_presence": frames.face_presence, "mean_motion": frames.mean_motion}
+    return results
+
+def terminal_event(video: Video, results: dict) -> dict:
+    return {"video_id": video.id, "stage": video.status, "percent": 100, "data": results}
+
+def load_terminal_event(video_id: int) -> Optional[dict]:
+    """Terminal progress event built from the database, if processing has finished"""
+    db = SessionLocal()
+    try:
+        video = db.query(Video).filter(Video.id == video_id).first()
+        if not video or video.status not in TERMINAL_STAGES:
+            return None
+        return terminal_event(video, load_video_results(db, video))
+    finally:
+        db.close()
+
+@app.get("/analysis/{video_id}/events")
+async def analysis_events(
+    request: Request,
+    video_id: int,
+    db: Session = Depends(get_db),
+    current_user: SessionUser = Depends(require_user)
+):
+    """Stream processing progress for a video as Server-Sent Events"""
+    require_video_owner(video_id, db, current_user)
+    video = db.query(Video).filter(Video.id == video_id).first()
+    if not video:
+        raise HTTPException(status_code=404, detail="Video not found")
+    
+    broker = get_broker()
+    # Processing finished before this process saw it (e.g. after a restart)
+    finished = None
+    if video.status in TERMINAL_STAGES and not broker.history(video_id):
+        finished = terminal_event(video, load_video_results(db, video))
+    
+    async def event_stream():
+        if finished:
+            yield format_sse(finished)
+            return
+        
+        queue = broker.subscribe(video_id)
+        try:
+            while True:
+                if await request.is_disconnected():
+                    break
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=PROGRESS_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    # With several workers, processing may run in another process whose
+                    # events this broker never sees; fall back to the stored status
+                    stored = await run_in_threadpool(load_terminal_event, video_id)
+                    if stored:
+                        yield format_sse(stored)
+                        break
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(event)
+                if event["stage"] in TERMINAL_STAGES:
+                    break
+        finally:
+            broker.unsubscribe(video_id, queue)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.post("/save_note")
 async def save_note(
     video_id: int = Form(...),
     prompt_id: int = Form(...),
     content: str = Form(...),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    current_user: SessionUser = Depends(require_user)
 ):
     """Save or update a note"""
-    # Check if note already exists
-    existing_note = db.query(Note).filter(
+    require_video_owner(video_id, db, current_user)
+    
+    # Get prompt to determine view_type
+    prompt = db.query(Prompt).filter(Prompt.id == prompt_id).first()
+    if not prompt:
+        raise HTTPException(status_code=404, detail="Prompt not found")
+    
+    # Write to the video first: its row lock (the database lock on SQLite) is held
+    # until commit, so concurrent saves of this video's notes take turns and
+    # the content read below stays current
+    bump_video_version(db, video_id)
+    previous = db.query(Note.content).filter(
         Note.video_id == video_id,
         Note.prompt_id == prompt_id
     ).first()
+    upsert_note(db, video_id, prompt_id, prompt.view_type, content)
     
-    if existing_note:
-        existing_note.content = content
-    else:
-        # Get prompt to determine view_type
-        prompt = db.query(Prompt).filter(Prompt.id == prompt_id).first()
-        if not prompt:
-            raise HTTPException(status_code=404, detail="Prompt not found")
-        
-        note = Note(
-            video_id=video_id,
-            prompt_id=prompt_id,
-            view_type=prompt.view_type,
-            content=content
-        )
-        db.add(note)
+    # Counts only include notes with content
+    delta = int(note_has_content(content)) - int(previous is not None and note_has_content(previous.content))
+    if delta:
+        record_note_added(db, video_id, delta)
+        record_note_for_trends(db, video_id, delta)
     
     db.commit()
     return {"status": "success"}
 
+@app.post("/save_transcript")
+async def save_transcript(
+    video_id: int = Form(...),
+    content: str = Form(...),
+    db: Session = Depends(get_db),
+    current_user: SessionUser = Depends(require_user)
+):
+    """Save the transcript for a video"""
+    require_video_owner(video_id, db, current_user)
+    video = db.query(Video).filter(Video.id == video_id).first()
+    if not video:
+        raise HTTPException(status_code=404, detail="Video not found")
+    
+    video.transcript = content
+    bump_video_version(db, video_id)
+    db.commit()
+    return {"status": "success"}
+
+@app.get("/search")
+async def search(
+    q: str,
+    limit: int = DEFAULT_SEARCH_LIMIT,
+    db: Session = Depends(get_db),
+    current_user: SessionUser = Depends(require_user)
+):
+    """Ranked full-text search over the current user's notes and transcripts"""
+    return {"query": q, "results": search_notes(db, current_user.id, q, limit=limit)}
+
 @app.get("/report/{video_id}", response_class=HTMLResponse)
 async def report_page(
     request: Request,
     video_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    current_user: SessionUser = Depends(require_page_user)
 ):
     """Generate simple report combining all notes"""
+    require_video_owner(video_id, db, current_user)
     video = db.query(Video).filter(Video.id == video_id).first()
     if not video:
         raise HTTPException(status_code=404, detail="Video not found")
     
+    etag = page_etag(build_id, "report", video.id, video.version)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    
     # Get all notes with prompts
     notes = db.query(Note).join(Prompt).filter(
         Note.video_id == video_id
@@ -251,40 +723,71 @@ async def report_page(
         "request": request,
         "video": video,
         "notes_by_view": notes_by_view
-    })
-
-from fastapi import Depends, HTTPException
-from fastapi.security import HTTPBearer
+    }, headers={"ETag": etag, "Cache-Control": PRIVATE_REVALIDATE_CACHE_CONTROL})
 
-security = HTTPBearer()
+@app.get("/video/{video_id}/timeline")
+async def video_timeline(
+    video_id: int,
+    db: Session = Depends(get_db),
+    current_user: SessionUser = Depends(require_user)
+):
+    """Per-second motion and face timeline from frame analysis"""
+    require_video_owner(video_id, db, current_user)
+    frames = db.query(FrameTimeline).filter(FrameTimeline.video_id == video_id).first()
+    if not frames:
+        raise HTTPException(status_code=404, detail="Frame analysis not available")
+    
+    return {
+        "video_id": video_id,
+        "sample_rate": frames.sample_rate,
+        "face_presence": frames.face_presence,
+        "mean_motion": frames.mean_motion,
+        "timeline": frames.timeline
+    }
 
 @app.get("/video/{video_id}")
 async def serve_video(
     video_id: int,
+    request: Request,
     db: Session = Depends(get_db),
-    credentials: HTTPBearer = Depends(security)
+    current_user: Optional[SessionUser] = Depends(get_current_user)
 ):
     """Serve video file with proper headers for HTML5 video playback"""
-    video = db.query(Video).filter(Video.id == video_id).first()
-    if not video:
-        raise HTTPException(status_code=404, detail="Video not found")
-    
-    # Verify video ownership
-    if video.user_id != int(credentials.credentials):
-        raise HTTPException(status_code=403, detail="Not authorized to access this video")
+    # Accepts the session cookie (for <video> elements) or a Bearer token.
+    # User and ownership lookups are cached, so range requests while
+    # scrubbing don't query the database.
+    if not current_user:
+        raise HTTPException(status_code=403, detail="Not authenticated")
+    video = require_video_owner(video_id, db, current_user)
     
-    file_path = f"app/static/uploads/{video.filename}"
-    if not os.path.exists(file_path):
+    storage = get_storage()
+    key = upload_key(video.filename)
+    try:
+        stat = await run_in_threadpool(storage.stat, key)
+    except ObjectNotFound:
         raise HTTPException(status_code=404, detail="Video file not found")
     
-    return FileResponse(
-        file_path,
-        media_type="video/mp4",
-        headers={
-            "Accept-Ranges": "bytes",
-            "Content-Type": "video/mp4"
-        }
-    )
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Type": "video/mp4",
+        "ETag": stat.etag
+    }
+    try:
+        byte_range = parse_range_header(request.headers.get("range"), stat.size)
+    except ValueError:
+        raise HTTPException(status_code=416, headers={"Content-Range": f"bytes */{stat.size}"})
+    
+    if byte_range is None:
+        start, end, status_code = 0, stat.size - 1, 200
+    else:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{stat.size}"
+    headers["Content-Length"] = str(end - start + 1)
+    
+    # Streamed chunk by chunk from storage, so only the requested range is read
+    chunks = await run_in_threadpool(storage.get_range, key, start, end) if stat.size else iter(())
+    return StreamingResponse(chunks, status_code=status_code, media_type="video/mp4", headers=headers)
 
 if __name__ == "__main__":
     import uvicorn
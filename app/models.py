@@ -1,10 +1,10 @@
-from sqlalchemy import Column, Integer, String, Text, Float, DateTime, Boolean, ForeignKey
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, String, Text, Float, Date, DateTime, Boolean, ForeignKey, Index, UniqueConstraint, JSON
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
-from flask_login import UserMixin
 
-class User(UserMixin, Base):
+class User(Base):
     __tablename__ = "users"
     
     id = Column(Integer, primary_key=True, index=True)
@@ -13,34 +13,56 @@ class User(UserMixin, Base):
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    # Profile stats, maintained on write (see app.utils.dashboard)
+    video_count = Column(Integer, default=0, nullable=False)
+    completed_video_count = Column(Integer, default=0, nullable=False)
+    note_count = Column(Integer, default=0, nullable=False)
+    total_duration = Column(Float, default=0.0, nullable=False)
+    
     videos = relationship("Video", back_populates="user")
     
     def set_password(self, password):
-        from werkzeug.security import generate_password_hash
-        self.password_hash = generate_password_hash(password)
+        from app.auth import hash_password
+        self.password_hash = hash_password(password)
         
     def check_password(self, password):
-        from werkzeug.security import check_password_hash
-        return check_password_hash(self.password_hash, password)
+        from app.auth import verify_password
+        return verify_password(password, self.password_hash)
 
 class Video(Base):
     __tablename__ = "videos"
+    __table_args__ = (
+        # Keyset pagination for the per-user dashboard listing
+        Index("ix_videos_user_uploaded_id", "user_id", "uploaded_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     filename = Column(String, unique=True, index=True)
     original_name = Column(String)
     file_size = Column(Integer)
     duration = Column(Float, nullable=True)
-    uploaded_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Set client-side so stored values round-trip exactly through pagination cursors
+    uploaded_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), server_default=func.now())
     status = Column(String, default="uploaded")  # uploaded, processing, completed, error
+    note_count = Column(Integer, default=0, nullable=False)  # maintained on write
+    transcript = Column(Text, nullable=True)  # full-text indexed, see app.utils.search
+    version = Column(Integer, default=1, nullable=False)  # bumped on every change shown on analysis/report pages
+    input_hash = Column(String(64), nullable=True)  # sha256 of the upload the current results came from
+    processing_owner = Column(String(32), nullable=True)  # worker holding the processing lock, see app.utils.processing_lock
+    processing_expires_at = Column(DateTime(timezone=True), nullable=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     
     # Relationships
     user = relationship("User", back_populates="videos")
     notes = relationship("Note", back_populates="video", cascade="all, delete-orphan")
+    frame_timeline = relationship("FrameTimeline", back_populates="video", uselist=False, cascade="all, delete-orphan")
 
 class Note(Base):
     __tablename__ = "notes"
+    __table_args__ = (
+        # One note per prompt, so concurrent saves update instead of duplicating it
+        Index("uq_notes_video_prompt", "video_id", "prompt_id", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     video_id = Column(Integer, ForeignKey("videos.id"))
@@ -55,6 +77,11 @@ class Note(Base):
 
 class Prompt(Base):
     __tablename__ = "prompts"
+    __table_args__ = (
+        # Lets concurrent startup seeding from several workers fail cleanly instead of duplicating prompts
+        # An index rather than a constraint, so migrate_schema can add it to existing databases
+        Index("uq_prompts_view_order", "view_type", "order_index", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     view_type = Column(String)  # video, audio, text
@@ -63,4 +90,57 @@ class Prompt(Base):
     active = Column(Boolean, default=True)
     
     # Relationship with notes
-    notes = relationship("Note", back_populates="prompt")
\ No newline at end of file
+    notes = relationship("Note", back_populates="prompt")
+
+# Per-recording metrics snapshot, written when processing completes
+class RecordingMetrics(Base):
+    __tablename__ = "recording_metrics"
+    __table_args__ = (
+        Index("ix_recording_metrics_user_recorded", "user_id", "recorded_at"),
+    )
+    
+    video_id = Column(Integer, ForeignKey("videos.id"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    recorded_at = Column(DateTime(timezone=True))
+    period_start = Column(Date)  # week bucket this recording is counted in
+    duration = Column(Float, nullable=True)
+    speaking_rate = Column(Float, nullable=True)  # syllables per minute of speech
+    pause_ratio = Column(Float, nullable=True)
+    loudness_variance = Column(Float, nullable=True)
+    note_count = Column(Integer, default=0, nullable=False)
+
+# Weekly per-user sums of recording metrics, maintained incrementally
+class TrendRollup(Base):
+    __tablename__ = "trend_rollups"
+    __table_args__ = (
+        UniqueConstraint("user_id", "period_start", name="uq_trend_rollups_user_period"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    period_start = Column(Date)
+    recording_count = Column(Integer, default=0, nullable=False)
+    note_count = Column(Integer, default=0, nullable=False)
+    # Sums and sample counts, so averages skip recordings missing a metric
+    duration_sum = Column(Float, default=0.0, nullable=False)
+    duration_count = Column(Integer, default=0, nullable=False)
+    speaking_rate_sum = Column(Float, default=0.0, nullable=False)
+    speaking_rate_count = Column(Integer, default=0, nullable=False)
+    pause_ratio_sum = Column(Float, default=0.0, nullable=False)
+    pause_ratio_count = Column(Integer, default=0, nullable=False)
+    loudness_variance_sum = Column(Float, default=0.0, nullable=False)
+    loudness_variance_count = Column(Integer, default=0, nullable=False)
+
+# Per-second body-language timeline from sampled video frames
+class FrameTimeline(Base):
+    __tablename__ = "frame_timelines"
+    
+    video_id = Column(Integer, ForeignKey("videos.id"), primary_key=True)
+    sample_rate = Column(Float)  # frames analyzed per second
+    # Parallel arrays keyed t, motion, face, face_x, face_y, face_size
+    timeline = Column(JSON)
+    face_presence = Column(Float, nullable=True)
+    mean_motion = Column(Float, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    video = relationship("Video", back_populates="frame_timeline")
\ No newline at end of file
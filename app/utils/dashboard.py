@@ -0,0 +1,143 @@
+import base64
+from datetime import datetime
+from typing import Optional, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from app.models import User, Video
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(uploaded_at: datetime, video_id: int) -> str:
+    """
+    Encode the position of the last video on a page
+    """
+    raw = f"{uploaded_at.isoformat()}|{video_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a cursor produced by encode_cursor
+    Raises ValueError if the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        uploaded_at, video_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(uploaded_at), int(video_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def list_user_videos(db: Session, user_id: int, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> dict:
+    """
+    List a user's videos newest first using keyset pagination
+    on (user_id, uploaded_at, id), so every page costs the same
+    Returns dict with 'videos' and 'next_cursor' (None on the last page)
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    query = db.query(Video).filter(Video.user_id == user_id)
+    if cursor:
+        uploaded_at, video_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            Video.uploaded_at < uploaded_at,
+            and_(Video.uploaded_at == uploaded_at, Video.id < video_id)
+        ))
+
+    # Fetch one extra row to know whether another page exists
+    videos = query.order_by(Video.uploaded_at.desc(), Video.id.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(videos) > limit:
+        videos = videos[:limit]
+        next_cursor = encode_cursor(videos[-1].uploaded_at, videos[-1].id)
+
+    return {"videos": videos, "next_cursor": next_cursor}
+
+
+def serialize_video(video: Video) -> dict:
+    """
+    Dashboard representation of a video
+    """
+    return {
+        "id": video.id,
+        "original_name": video.original_name,
+        "file_size": video.file_size,
+        "duration": video.duration,
+        "uploaded_at": video.uploaded_at.isoformat() if video.uploaded_at else None,
+        "status": video.status,
+        "note_count": video.note_count or 0
+    }
+
+
+def record_video_uploaded(db: Session, user_id: Optional[int]):
+    """
+    Update profile stats for a newly uploaded video
+    Call inside the transaction that adds the video
+    """
+    if user_id is None:
+        return
+    db.query(User).filter(User.id == user_id).update(
+        {User.video_count: User.video_count + 1},
+        synchronize_session=False
+    )
+
+
+def record_video_completed(db: Session, video: Video):
+    """
+    Update profile stats when a video finishes processing
+    Call inside the transaction that marks the video completed
+    """
+    if video.user_id is None:
+        return
+    db.query(User).filter(User.id == video.user_id).update(
+        {
+            User.completed_video_count: User.completed_video_count + 1,
+            User.total_duration: User.total_duration + (video.duration or 0.0)
+        },
+        synchronize_session=False
+    )
+
+
+def note_has_content(content: Optional[str]) -> bool:
+    """
+    Whether a note counts towards note totals; empty notes don't
+    """
+    return bool(content and content.strip())
+
+
+def record_note_added(db: Session, video_id: int, delta: int = 1):
+    """
+    Update per-video and profile note counts for a note gaining content
+    (delta=-1 for a note that was emptied)
+    Call inside the transaction that saves the note
+    """
+    db.query(Video).filter(Video.id == video_id).update(
+        {Video.note_count: Video.note_count + delta},
+        synchronize_session=False
+    )
+    user_id = db.query(Video.user_id).filter(Video.id == video_id).scalar()
+    if user_id is not None:
+        db.query(User).filter(User.id == user_id).update(
+            {User.note_count: User.note_count + delta},
+            synchronize_session=False
+        )
+
+
+def get_profile_stats(db: Session, user_id: int) -> dict:
+    """
+    Read the pre-aggregated profile stats for a user
+    """
+    user = db.query(User).filter(User.id == user_id).first()
+    if not user:
+        return {"video_count": 0, "completed_video_count": 0, "note_count": 0, "total_duration": 0.0}
+    return {
+        "video_count": user.video_count or 0,
+        "completed_video_count": user.completed_video_count or 0,
+        "note_count": user.note_count or 0,
+        "total_duration": user.total_duration or 0.0
+    }
@@ -1,6 +1,8 @@
 from fastapi import UploadFile
 import os
 
+MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB in bytes
+
 def validate_video_file(file: UploadFile) -> dict:
     """
     Validate uploaded video file
@@ -11,9 +13,6 @@ def validate_video_file(file: UploadFile) -> dict:
     if not file:
         return {"valid": False, "error": "No file provided"}
     
-    # Check file size (50MB limit)
-    MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB in bytes
-    
     # Get file extension
     if not file.filename:
         return {"valid": False, "error": "Invalid filename"}
@@ -38,9 +37,13 @@ def check_file_size(content: bytes) -> dict:
     """
     Check if file content size is within limits
     """
-    MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB in bytes
-    
-    if len(content) > MAX_FILE_SIZE:
-        return {"valid": False, "error": f"File size exceeds 50MB limit. Current size: {len(content) / (1024*1024):.1f}MB"}
+    return check_upload_size(len(content))
+
+def check_upload_size(size: int) -> dict:
+    """
+    Check if a file size in bytes is within limits
+    """
+    if size > MAX_FILE_SIZE:
+        return {"valid": False, "error": f"File size exceeds 50MB limit. Current size: {size / (1024*1024):.1f}MB"}
     
     return {"valid": True, "error": None}
\ No newline at end of file
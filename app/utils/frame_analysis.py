@@ -0,0 +1,214 @@
+import os
+import numpy as np
+from typing import Iterator, List, Optional, Tuple
+
+from app.utils.stages import json_stage, run_json_stage
+
+try:
+    import cv2
+    OPENCV_AVAILABLE = True
+except ImportError:
+    OPENCV_AVAILABLE = False
+    print("Warning: opencv not available. Frame analysis will be skipped.")
+
+# Frames are shrunk to this width right after decoding, so memory use does
+# not depend on the recording's resolution
+ANALYSIS_WIDTH = 320
+
+DEFAULT_SAMPLE_RATE = float(os.getenv("FRAME_SAMPLE_RATE", "1.0"))  # frames per second
+DEFAULT_BATCH_SIZE = 8
+
+_face_detector = None
+
+
+def _get_face_detector():
+    """Haar cascade face detector, or None if this OpenCV build lacks it"""
+    global _face_detector
+    if _face_detector is None:
+        if not hasattr(cv2, "CascadeClassifier"):
+            return None
+        _face_detector = cv2.CascadeClassifier(
+            os.path.join(cv2.data.haarcascades, "haarcascade_frontalface_default.xml")
+        )
+    return _face_detector
+
+
+def sample_times(duration: float, sample_rate: float) -> np.ndarray:
+    """
+    Timestamps (seconds) to sample, evenly spaced at sample_rate per second
+    """
+    if duration <= 0 or sample_rate <= 0:
+        return np.array([])
+    return np.arange(0.0, duration, 1.0 / sample_rate)
+
+
+def iter_sampled_frames(file_path: str, sample_rate: float) -> Iterator[Tuple[float, np.ndarray]]:
+    """
+    Yield (timestamp, small grayscale frame) pairs by seeking to each sample
+    point instead of decoding every frame; only one frame is held at a time
+    """
+    capture = cv2.VideoCapture(file_path)
+    try:
+        fps = capture.get(cv2.CAP_PROP_FPS) or 0
+        frame_count = capture.get(cv2.CAP_PROP_FRAME_COUNT) or 0
+        duration = frame_count / fps if fps > 0 else 0
+
+        for t in sample_times(duration, sample_rate):
+            capture.set(cv2.CAP_PROP_POS_MSEC, t * 1000)
+            ok, frame = capture.read()
+            if not ok:
+                continue
+            height, width = frame.shape[:2]
+            scale = ANALYSIS_WIDTH / width if width > ANALYSIS_WIDTH else 1.0
+            if scale < 1.0:
+                frame = cv2.resize(frame, (ANALYSIS_WIDTH, int(height * scale)), interpolation=cv2.INTER_AREA)
+            yield float(t), cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    finally:
+        capture.release()
+
+
+def motion_energy(batch: np.ndarray, previous: Optional[np.ndarray]) -> np.ndarray:
+    """
+    Mean absolute difference between consecutive frames, scaled to 0-1
+    batch has shape (n, height, width); the first frame is compared with
+    previous (the last frame of the prior batch), or scores 0 without one
+    """
+    frames = batch.astype(np.int16)
+    if previous is not None:
+        frames = np.concatenate([previous[np.newaxis].astype(np.int16), frames])
+        diffs = np.abs(np.diff(frames, axis=0)).mean(axis=(1, 2))
+    else:
+        diffs = np.concatenate([[0.0], np.abs(np.diff(frames, axis=0)).mean(axis=(1, 2))])
+    return diffs / 255.0
+
+
+def detect_face(frame: np.ndarray) -> Optional[Tuple[float, float, float]]:
+    """
+    Largest frontal face as (center_x, center_y, width), normalized to 0-1
+    """
+    detector = _get_face_detector()
+    if detector is None:
+        return None
+    faces = detector.detectMultiScale(frame, scaleFactor=1.1, minNeighbors=5, minSize=(24, 24))
+    if len(faces) == 0:
+        return None
+    x, y, w, h = max(faces, key=lambda face: face[2] * face[3])
+    height, width = frame.shape[:2]
+    return (x + w / 2) / width, (y + h / 2) / height, w / width
+
+
+def build_timeline(samples: List[dict]) -> dict:
+    """
+    Collapse samples into a compact per-second timeline of parallel arrays
+    """
+    seconds = {}
+    for sample in samples:
+        seconds.setdefault(int(sample["t"]), []).append(sample)
+
+    timeline = {"t": [], "motion": [], "face": [], "face_x": [], "face_y": [], "face_size": []}
+    for second in sorted(seconds):
+        group = seconds[second]
+        faces = [s for s in group if s["face"] is not None]
+        timeline["t"].append(second)
+        timeline["motion"].append(round(float(np.mean([s["motion"] for s in group])), 4))
+        timeline["face"].append(round(len(faces) / len(group), 2))
+        if faces:
+            timeline["face_x"].append(round(float(np.mean([s["face"][0] for s in faces])), 3))
+            timeline["face_y"].append(round(float(np.mean([s["face"][1] for s in faces])), 3))
+            timeline["face_size"].append(round(float(np.mean([s["face"][2] for s in faces])), 3))
+        else:
+            timeline["face_x"].append(None)
+            timeline["face_y"].append(None)
+            timeline["face_size"].append(None)
+    return timeline
+
+
+def summarize_timeline(timeline: dict) -> dict:
+    """
+    Whole-recording summary of a timeline
+    """
+    if not timeline["t"]:
+        return {"face_presence": None, "mean_motion": None, "max_motion": None}
+    return {
+        "face_presence": float(np.mean(timeline["face"])),
+        "mean_motion": float(np.mean(timeline["motion"])),
+        "max_motion": float(np.max(timeline["motion"]))
+    }
+
+
+def _empty_result(sample_rate: float) -> dict:
+    timeline = build_timeline([])
+    return {"sample_rate": sample_rate, "timeline": timeline, "summary": summarize_timeline(timeline)}
+
+
+def _analyze(file_path: str, sample_rate: float, batch_size: int) -> dict:
+    samples = []
+    previous = None
+    batch_times, batch_frames = [], []
+
+    def flush():
+        nonlocal previous
+        batch = np.stack(batch_frames)
+        motions = motion_energy(batch, previous)
+        for t, frame, motion in zip(batch_times, batch_frames, motions):
+            samples.append({"t": t, "motion": float(motion), "face": detect_face(frame)})
+        previous = batch_frames[-1]
+        batch_times.clear()
+        batch_frames.clear()
+
+    for t, frame in iter_sampled_frames(file_path, sample_rate):
+        batch_times.append(t)
+        batch_frames.append(frame)
+        if len(batch_frames) >= batch_size:
+            flush()
+    if batch_frames:
+        flush()
+
+    timeline = build_timeline(samples)
+    summary = summarize_timeline(timeline)
+    if _get_face_detector() is None:
+        # Unknown rather than "never visible"
+        summary["face_presence"] = None
+    return {"sample_rate": sample_rate, "timeline": timeline, "summary": summary}
+
+
+def analyze_frames(
+    file_path: str,
+    sample_rate: float = DEFAULT_SAMPLE_RATE,
+    batch_size: int = DEFAULT_BATCH_SIZE
+) -> dict:
+    """
+    Sample frames and estimate motion energy and face presence/position
+    Returns dictionary with the per-second timeline and a summary
+    Holds at most batch_size downscaled frames in memory
+    """
+    if not OPENCV_AVAILABLE:
+        return _empty_result(sample_rate)
+
+    try:
+        return _analyze(file_path, sample_rate, batch_size)
+    except Exception as e:
+        print(f"Error analyzing frames: {e}")
+        return _empty_result(sample_rate)
+
+
+FRAMES_STAGE = json_stage(
+    "frames",
+    f"1-{DEFAULT_SAMPLE_RATE}",
+    lambda file_path: _analyze(file_path, DEFAULT_SAMPLE_RATE, DEFAULT_BATCH_SIZE)
+)
+
+
+def analyze_video_frames(file_path: str, input_hash: Optional[str] = None) -> dict:
+    """
+    analyze_frames at the default settings, reusing the stored result when
+    this input was already analyzed
+    """
+    if not OPENCV_AVAILABLE:
+        return _empty_result(DEFAULT_SAMPLE_RATE)
+
+    try:
+        return run_json_stage(FRAMES_STAGE, file_path, input_hash)
+    except Exception as e:
+        print(f"Error analyzing frames: {e}")
+        return _empty_result(DEFAULT_SAMPLE_RATE)
@@ -0,0 +1,214 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import posixpath
+from typing import Dict, Optional
+
+from fastapi import Request
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# Fingerprinted URLs never change content, so browsers may keep them forever
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Unfingerprinted assets and HTML pages must be revalidated on each use
+REVALIDATE_CACHE_CONTROL = "no-cache"
+PRIVATE_REVALIDATE_CACHE_CONTROL = "private, no-cache"
+
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+MIN_COMPRESS_SIZE = 1024
+
+# Directories under static/ that hold user data rather than build assets;
+# never fingerprinted and never served
+EXCLUDED_DIRS = ("uploads",)
+
+
+class Asset:
+    """A static file loaded once, with its fingerprint and precompressed variants"""
+
+    def __init__(self, path: str, content: bytes):
+        self.path = path
+        self.content = content
+        self.digest = hashlib.sha256(content).hexdigest()[:12]
+        self.etag = f'"{self.digest}"'
+        self.media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        self.variants: Dict[str, bytes] = {}
+
+        if len(content) >= MIN_COMPRESS_SIZE and self.media_type.startswith(COMPRESSIBLE_TYPES):
+            compressed = {"gzip": gzip.compress(content, compresslevel=9, mtime=0)}
+            if BROTLI_AVAILABLE:
+                compressed["br"] = brotli.compress(content, quality=11)
+            # Only keep variants that are actually smaller
+            self.variants = {k: v for k, v in compressed.items() if len(v) < len(content)}
+
+    @property
+    def fingerprinted_path(self) -> str:
+        root, ext = os.path.splitext(self.path)
+        return f"{root}.{self.digest}{ext}"
+
+
+class AssetManifest:
+    """
+    Maps static asset paths to content-fingerprinted URLs
+    Built once at startup; restart the process to pick up changed assets
+    """
+
+    def __init__(self, directory: str, url_prefix: str = "/static"):
+        self.directory = directory
+        self.url_prefix = url_prefix
+        self.assets: Dict[str, Asset] = {}
+        self.by_fingerprint: Dict[str, Asset] = {}
+        self.build()
+
+    def build(self):
+        assets = {}
+        for root, dirs, files in os.walk(self.directory):
+            dirs[:] = [d for d in dirs if os.path.relpath(os.path.join(root, d), self.directory) not in EXCLUDED_DIRS]
+            for name in files:
+                full_path = os.path.join(root, name)
+                rel_path = os.path.relpath(full_path, self.directory).replace(os.sep, "/")
+                with open(full_path, "rb") as f:
+                    assets[rel_path] = Asset(rel_path, f.read())
+
+        self.assets = assets
+        self.by_fingerprint = {asset.fingerprinted_path: asset for asset in assets.values()}
+
+    @property
+    def digest(self) -> str:
+        """Combined fingerprint of every asset"""
+        combined = "".join(f"{path}:{asset.digest}" for path, asset in sorted(self.assets.items()))
+        return hashlib.sha256(combined.encode()).hexdigest()[:12]
+
+    def url(self, path: str) -> str:
+        """Fingerprinted URL for a static asset (falls back to the plain URL)"""
+        asset = self.assets.get(path.lstrip("/"))
+        if asset is None:
+            return f"{self.url_prefix}/{path.lstrip('/')}"
+        return f"{self.url_prefix}/{asset.fingerprinted_path}"
+
+    def resolve(self, path: str) -> Optional[Asset]:
+        """Asset for a fingerprinted request path, if it is one"""
+        return self.by_fingerprint.get(path.replace(os.sep, "/"))
+
+
+def choose_encoding(accept_encoding: str, available) -> Optional[str]:
+    """
+    Pick the best precompressed variant the client accepts
+    """
+    accepted = set()
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        params = params.strip().replace(" ", "")
+        if params.startswith("q="):
+            try:
+                if float(params[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+
+    for encoding in ("br", "gzip"):
+        if encoding in available and (encoding in accepted or "*" in accepted):
+            return encoding
+    return None
+
+
+class CachedStaticFiles(StaticFiles):
+    """
+    StaticFiles that serves fingerprinted URLs from memory with immutable
+    cache headers and precompressed bodies; plain URLs are revalidated
+    """
+
+    def __init__(self, *args, manifest: AssetManifest, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.manifest = manifest
+
+    async def get_response(self, path: str, scope) -> Response:
+        # Never serve private files that end up under the static directory
+        top_level = posixpath.normpath(path.replace(os.sep, "/")).lstrip("/").split("/", 1)[0]
+        if top_level in EXCLUDED_DIRS:
+            raise HTTPException(status_code=404)
+
+        asset = self.manifest.resolve(path)
+        if asset is None:
+            response = await super().get_response(path, scope)
+            response.headers.setdefault("Cache-Control", REVALIDATE_CACHE_CONTROL)
+            return response
+
+        request_headers = Headers(scope=scope)
+        headers = {
+            "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+            "ETag": asset.etag,
+            "Vary": "Accept-Encoding"
+        }
+        if etag_matches(request_headers.get("if-none-match"), asset.etag):
+            return Response(status_code=304, headers=headers)
+
+        encoding = choose_encoding(request_headers.get("accept-encoding", ""), asset.variants)
+        body = asset.content
+        if encoding:
+            body = asset.variants[encoding]
+            headers["Content-Encoding"] = encoding
+
+        if scope["method"] == "HEAD":
+            headers["Content-Length"] = str(len(body))
+            return Response(status_code=200, headers=headers, media_type=asset.media_type)
+        return Response(body, headers=headers, media_type=asset.media_type)
+
+
+def compute_build_id(template_dir: str, manifest: AssetManifest) -> str:
+    """
+    Fingerprint of the templates and static assets this process renders with
+    Included in page ETags so a deploy invalidates cached pages
+    """
+    digest = hashlib.sha256(manifest.digest.encode())
+    for root, dirs, files in sorted(os.walk(template_dir)):
+        for name in sorted(files):
+            with open(os.path.join(root, name), "rb") as f:
+                digest.update(name.encode())
+                digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    True if an If-None-Match header matches the given ETag (weak comparison)
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    def strip_weak(tag):
+        tag = tag.strip()
+        return tag[2:] if tag.startswith("W/") else tag
+
+    return strip_weak(etag) in [strip_weak(tag) for tag in if_none_match.split(",")]
+
+
+def page_etag(build_id: str, *parts) -> str:
+    """
+    Weak ETag for a rendered page, keyed on the data version it shows
+    """
+    key = "-".join(str(part) for part in (build_id,) + parts)
+    return f'W/"{hashlib.sha256(key.encode()).hexdigest()[:16]}"'
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """
+    304 response if the client's cached copy is current, else None
+    """
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(
+            status_code=304,
+            headers={"ETag": etag, "Cache-Control": PRIVATE_REVALIDATE_CACHE_CONTROL}
+        )
+    return None
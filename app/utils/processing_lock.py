@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from app.models import Video
+
+# A lease: runs renew it between stages, so it only needs to outlast the
+# longest single stage; a crashed worker's lock expires after this
+PROCESSING_LOCK_TTL = timedelta(minutes=10)
+
+# Seconds between renewals while a run waits on a long stage
+PROCESSING_LOCK_RENEW_INTERVAL = 60
+
+# Uploads queue processing right after the response; one never claimed after this long was lost
+UNCLAIMED_GRACE = timedelta(minutes=5)
+
+
+def claim_video(db: Session, video_id: int, owner: str, ttl: timedelta = PROCESSING_LOCK_TTL) -> bool:
+    """
+    Take the per-video processing lock with a single conditional UPDATE,
+    so only one worker (in any process or on any host) processes a video
+    Returns False if another worker holds an unexpired lock
+    """
+    now = datetime.now(timezone.utc)
+    claimed = db.query(Video).filter(
+        Video.id == video_id,
+        or_(Video.processing_owner.is_(None), Video.processing_expires_at < now)
+    ).update(
+        {Video.processing_owner: owner, Video.processing_expires_at: now + ttl},
+        synchronize_session=False
+    )
+    db.commit()
+    return claimed == 1
+
+
+def renew_claim(db: Session, video_id: int, owner: str, ttl: timedelta = PROCESSING_LOCK_TTL) -> bool:
+    """
+    Extend the lock if owner still holds it
+    Returns False if it expired and another worker took the video over
+    """
+    renewed = db.query(Video).filter(Video.id == video_id, Video.processing_owner == owner).update(
+        {Video.processing_expires_at: datetime.now(timezone.utc) + ttl},
+        synchronize_session=False
+    )
+    db.commit()
+    return renewed == 1
+
+
+def release_video(db: Session, video_id: int, owner: str):
+    """
+    Release the lock if owner still holds it
+    """
+    db.query(Video).filter(Video.id == video_id, Video.processing_owner == owner).update(
+        {Video.processing_owner: None, Video.processing_expires_at: None},
+        synchronize_session=False
+    )
+    db.commit()
+
+
+def find_stalled_videos(db: Session, now: Optional[datetime] = None) -> List[Tuple[int, str]]:
+    """
+    (id, filename) of videos stuck in "processing": their worker stopped
+    (claim expired) or their queued run was lost before it claimed the video
+    """
+    now = now or datetime.now(timezone.utc)
+    return [
+        (video.id, video.filename)
+        for video in db.query(Video.id, Video.filename).filter(
+            Video.status == "processing",
+            or_(
+                Video.processing_expires_at < now,
+                and_(Video.processing_owner.is_(None), Video.uploaded_at < now - UNCLAIMED_GRACE)
+            )
+        ).order_by(Video.id)
+    ]
@@ -0,0 +1,96 @@
+import asyncio
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+# Stages that end a video's event stream
+TERMINAL_STAGES = ("completed", "error")
+
+# How many videos' event history to keep for late subscribers
+MAX_TRACKED_VIDEOS = 256
+
+
+class ProgressBroker:
+    """
+    In-process pub/sub for video processing progress.
+    Processing runs in worker threads, so publish() is thread-safe and hands
+    events to each subscriber's event loop. Swap in another broker with
+    set_broker() as long as it exposes publish/subscribe/unsubscribe.
+    """
+
+    def __init__(self, max_tracked: int = MAX_TRACKED_VIDEOS):
+        self._lock = threading.Lock()
+        self._subscribers: Dict[int, List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._history: "OrderedDict[int, List[dict]]" = OrderedDict()
+        self._max_tracked = max_tracked
+
+    def publish(self, video_id: int, stage: str, percent: int, data: Optional[dict] = None) -> dict:
+        """Publish a stage transition for a video to all subscribers"""
+        event = {
+            "video_id": video_id,
+            "stage": stage,
+            "percent": max(0, min(100, int(percent))),
+            "data": data or {},
+        }
+        with self._lock:
+            history = self._history.setdefault(video_id, [])
+            history.append(event)
+            self._history.move_to_end(video_id)
+            while len(self._history) > self._max_tracked:
+                self._history.popitem(last=False)
+            subscribers = list(self._subscribers.get(video_id, []))
+
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+            except RuntimeError:
+                # Subscriber's loop has already shut down
+                pass
+        return event
+
+    def subscribe(self, video_id: int) -> asyncio.Queue:
+        """
+        Register a subscriber for a video. Must be called from inside the
+        event loop that will consume the queue. Events already published
+        for the video are replayed first so late subscribers catch up.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        with self._lock:
+            for event in self._history.get(video_id, []):
+                queue.put_nowait(event)
+            self._subscribers.setdefault(video_id, []).append((loop, queue))
+        return queue
+
+    def unsubscribe(self, video_id: int, queue: asyncio.Queue) -> None:
+        """Remove a subscriber queue"""
+        with self._lock:
+            subscribers = self._subscribers.get(video_id, [])
+            self._subscribers[video_id] = [s for s in subscribers if s[1] is not queue]
+            if not self._subscribers[video_id]:
+                del self._subscribers[video_id]
+
+    def history(self, video_id: int) -> List[dict]:
+        """Events published so far for a video"""
+        with self._lock:
+            return list(self._history.get(video_id, []))
+
+
+_broker = ProgressBroker()
+
+
+def get_broker() -> ProgressBroker:
+    """Return the active progress broker"""
+    return _broker
+
+
+def set_broker(broker) -> None:
+    """Replace the active progress broker (e.g. with a local message broker)"""
+    global _broker
+    _broker = broker
+
+
+def format_sse(event: dict) -> str:
+    """Format an event as a Server-Sent Events message"""
+    return f"event: {event['stage']}\ndata: {json.dumps(event)}\n\n"
@@ -0,0 +1,222 @@
+import html
+import re
+from itertools import zip_longest
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+
+# Private-use delimiters for highlight(); escaped text never contains them
+_MARK_START = "\ue000"
+_MARK_END = "\ue001"
+
+_SQLITE_INDEXES = [
+    # External-content FTS5 tables: the index stores only tokens, rows live in notes/videos
+    """CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+        content, content='notes', content_rowid='id', tokenize='porter unicode61'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS notes_fts_insert AFTER INSERT ON notes BEGIN
+        INSERT INTO notes_fts(rowid, content) VALUES (new.id, new.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS notes_fts_delete AFTER DELETE ON notes BEGIN
+        INSERT INTO notes_fts(notes_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS notes_fts_update AFTER UPDATE OF content ON notes BEGIN
+        INSERT INTO notes_fts(notes_fts, rowid, content) VALUES ('delete', old.id, old.content);
+        INSERT INTO notes_fts(rowid, content) VALUES (new.id, new.content);
+    END""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS transcripts_fts USING fts5(
+        transcript, content='videos', content_rowid='id', tokenize='porter unicode61'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS transcripts_fts_insert AFTER INSERT ON videos
+    WHEN new.transcript IS NOT NULL BEGIN
+        INSERT INTO transcripts_fts(rowid, transcript) VALUES (new.id, new.transcript);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS transcripts_fts_delete AFTER DELETE ON videos
+    WHEN old.transcript IS NOT NULL BEGIN
+        INSERT INTO transcripts_fts(transcripts_fts, rowid, transcript) VALUES ('delete', old.id, old.transcript);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS transcripts_fts_update AFTER UPDATE OF transcript ON videos BEGIN
+        INSERT INTO transcripts_fts(transcripts_fts, rowid, transcript)
+            SELECT 'delete', old.id, old.transcript WHERE old.transcript IS NOT NULL;
+        INSERT INTO transcripts_fts(rowid, transcript)
+            SELECT new.id, new.transcript WHERE new.transcript IS NOT NULL;
+    END""",
+]
+
+_POSTGRES_INDEXES = [
+    # Expression indexes stay in sync with the rows without triggers
+    """CREATE INDEX IF NOT EXISTS ix_notes_content_tsv ON notes
+        USING GIN (to_tsvector('english', coalesce(content, '')))""",
+    """CREATE INDEX IF NOT EXISTS ix_videos_transcript_tsv ON videos
+        USING GIN (to_tsvector('english', coalesce(transcript, '')))""",
+]
+
+
+def create_search_indexes(engine):
+    """
+    Create the full-text indexes for notes and transcripts
+    Safe to call on every startup
+    """
+    dialect = engine.dialect.name
+    with engine.begin() as conn:
+        if dialect == "sqlite":
+            existed = conn.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE name = 'notes_fts'"
+            )).first() is not None
+            for statement in _SQLITE_INDEXES:
+                conn.execute(text(statement))
+            if not existed:
+                # Index rows written before the FTS tables existed
+                conn.execute(text("INSERT INTO notes_fts(notes_fts) VALUES ('rebuild')"))
+                conn.execute(text("INSERT INTO transcripts_fts(transcripts_fts) VALUES ('rebuild')"))
+        elif dialect == "postgresql":
+            for statement in _POSTGRES_INDEXES:
+                conn.execute(text(statement))
+
+
+def build_match_query(query: str) -> str:
+    """
+    Turn free text into a safe FTS5 MATCH expression
+    Every word must match; the last word matches as a prefix
+    Returns an empty string if the query has no searchable words
+    """
+    words = re.findall(r"\w+", query)
+    if not words:
+        return ""
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def _render_highlight(fragment: str) -> str:
+    """
+    HTML-escape a highlighted fragment and turn the delimiters into <mark> tags
+    """
+    escaped = html.escape(fragment or "")
+    return escaped.replace(_MARK_START, "<mark>").replace(_MARK_END, "</mark>")
+
+
+def _search_sqlite(db: Session, user_id: int, query: str, limit: int) -> list:
+    match = build_match_query(query)
+    if not match:
+        return []
+
+    params = {"match": match, "user_id": user_id, "limit": limit, "start": _MARK_START, "end": _MARK_END}
+    note_rows = db.execute(text("""
+        SELECT n.id, n.video_id, n.view_type, p.question_text, v.original_name,
+               snippet(notes_fts, 0, :start, :end, '…', 24) AS fragment,
+               bm25(notes_fts) AS rank
+        FROM notes_fts
+        JOIN notes n ON n.id = notes_fts.rowid
+        JOIN videos v ON v.id = n.video_id
+        LEFT JOIN prompts p ON p.id = n.prompt_id
+        WHERE notes_fts MATCH :match AND v.user_id = :user_id
+        ORDER BY rank
+        LIMIT :limit
+    """), params).fetchall()
+    transcript_rows = db.execute(text("""
+        SELECT v.id, v.original_name,
+               snippet(transcripts_fts, 0, :start, :end, '…', 24) AS fragment,
+               bm25(transcripts_fts) AS rank
+        FROM transcripts_fts
+        JOIN videos v ON v.id = transcripts_fts.rowid
+        WHERE transcripts_fts MATCH :match AND v.user_id = :user_id
+        ORDER BY rank
+        LIMIT :limit
+    """), params).fetchall()
+
+    # bm25() is lower-is-better; flip it so higher scores rank first
+    notes = [{
+        "type": "note",
+        "note_id": row.id,
+        "video_id": row.video_id,
+        "video_name": row.original_name,
+        "view_type": row.view_type,
+        "prompt": row.question_text,
+        "snippet": _render_highlight(row.fragment),
+        "score": -row.rank
+    } for row in note_rows]
+    transcripts = [{
+        "type": "transcript",
+        "video_id": row.id,
+        "video_name": row.original_name,
+        "snippet": _render_highlight(row.fragment),
+        "score": -row.rank
+    } for row in transcript_rows]
+    return notes, transcripts
+
+
+def _search_postgres(db: Session, user_id: int, query: str, limit: int) -> list:
+    if not re.search(r"\w", query):
+        return []
+
+    params = {
+        "query": query,
+        "user_id": user_id,
+        "limit": limit,
+        "options": f"StartSel={_MARK_START}, StopSel={_MARK_END}, MaxFragments=1, MaxWords=24"
+    }
+    note_rows = db.execute(text("""
+        SELECT n.id, n.video_id, n.view_type, p.question_text, v.original_name,
+               ts_headline('english', n.content, q, :options) AS fragment,
+               ts_rank(to_tsvector('english', coalesce(n.content, '')), q) AS rank
+        FROM notes n
+        JOIN videos v ON v.id = n.video_id
+        LEFT JOIN prompts p ON p.id = n.prompt_id,
+             websearch_to_tsquery('english', :query) q
+        WHERE to_tsvector('english', coalesce(n.content, '')) @@ q AND v.user_id = :user_id
+        ORDER BY rank DESC
+        LIMIT :limit
+    """), params).fetchall()
+    transcript_rows = db.execute(text("""
+        SELECT v.id, v.original_name,
+               ts_headline('english', v.transcript, q, :options) AS fragment,
+               ts_rank(to_tsvector('english', coalesce(v.transcript, '')), q) AS rank
+        FROM videos v, websearch_to_tsquery('english', :query) q
+        WHERE to_tsvector('english', coalesce(v.transcript, '')) @@ q AND v.user_id = :user_id
+        ORDER BY rank DESC
+        LIMIT :limit
+    """), params).fetchall()
+
+    notes = [{
+        "type": "note",
+        "note_id": row.id,
+        "video_id": row.video_id,
+        "video_name": row.original_name,
+        "view_type": row.view_type,
+        "prompt": row.question_text,
+        "snippet": _render_highlight(row.fragment),
+        "score": float(row.rank)
+    } for row in note_rows]
+    transcripts = [{
+        "type": "transcript",
+        "video_id": row.id,
+        "video_name": row.original_name,
+        "snippet": _render_highlight(row.fragment),
+        "score": float(row.rank)
+    } for row in transcript_rows]
+    return notes, transcripts
+
+
+def search_notes(db: Session, user_id: int, query: str, limit: int = DEFAULT_SEARCH_LIMIT) -> list:
+    """
+    Ranked full-text search over a user's notes and transcripts
+    Returns result dicts with an HTML-safe highlighted snippet, alternating
+    between the best remaining note and transcript match
+    Scores are only comparable between results of the same type
+    """
+    limit = max(1, min(limit, MAX_SEARCH_LIMIT))
+    if db.get_bind().dialect.name == "postgresql":
+        notes, transcripts = _search_postgres(db, user_id, query, limit)
+    else:
+        notes, transcripts = _search_sqlite(db, user_id, query, limit)
+
+    # Each source is ranked against its own index statistics, so the scores
+    # can't be sorted together; interleave the two rankings instead
+    results = []
+    for pair in zip_longest(notes, transcripts):
+        results.extend(result for result in pair if result is not None)
+    return results[:limit]
@@ -0,0 +1,190 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Optional, Tuple, Union
+
+from app.utils.ttl_cache import TTLCache
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+    print("Warning: fcntl not available. Stage locks will only cover this process.")
+
+# Derived artifacts live in a directory per input hash, so identical inputs
+# share artifacts and a changed input never reuses stale ones
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", os.path.join(tempfile.gettempdir(), "psc-artifacts"))
+
+CHUNK_SIZE = 1024 * 1024  # 1MB
+
+# Hashes keyed by (path, size, mtime) so each stage of a run doesn't re-read the video
+_fingerprints = TTLCache(ttl=60 * 60, max_size=1000)
+
+_fallback_locks = {}
+_fallback_locks_guard = threading.Lock()
+
+
+@dataclass(frozen=True)
+class Stage:
+    """
+    A derived artifact: produce(input_path, output_path) writes filename
+    Bump version when the output format or algorithm changes
+    """
+    name: str
+    version: Union[int, str]
+    filename: str
+    produce: Callable[[str, str], None]
+    depends: Tuple["Stage", ...] = ()
+
+    @property
+    def fingerprint(self) -> str:
+        """Version tag covering this stage and the stages it reads"""
+        parts = [f"{self.name}:{self.version}"] + [stage.fingerprint for stage in self.depends]
+        return "+".join(parts)
+
+
+def file_fingerprint(path: str) -> str:
+    """
+    SHA-256 of a file's contents, cached until the file changes
+    """
+    result = os.stat(path)
+    cache_key = (os.path.abspath(path), result.st_size, result.st_mtime_ns)
+
+    def load():
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    return _fingerprints.get_or_load(cache_key, load)
+
+
+@contextmanager
+def file_lock(path: str):
+    """
+    Exclusive lock on path, held across threads and processes on this host
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if not FCNTL_AVAILABLE:
+        with _fallback_locks_guard:
+            lock = _fallback_locks.setdefault(path, threading.Lock())
+        with lock:
+            yield
+        return
+
+    # flock belongs to the open file, so threads each opening the file also exclude each other
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+@contextmanager
+def atomic_path(path: str):
+    """
+    Yield a temp path next to path; it replaces path only if the block succeeds,
+    so readers never see a partially written file
+    """
+    base, ext = os.path.splitext(path)
+    # Keep the extension, writers like ffmpeg pick the format from it
+    tmp_path = f"{base}.{uuid.uuid4().hex}.part{ext}"
+    try:
+        yield tmp_path
+        if os.path.exists(tmp_path):
+            os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def artifact_path(stage: Stage, input_hash: str) -> str:
+    return os.path.join(ARTIFACT_DIR, input_hash[:2], input_hash, stage.filename)
+
+
+def _meta_path(path: str) -> str:
+    return f"{path}.meta.json"
+
+
+def _is_current(stage: Stage, path: str, input_hash: str) -> bool:
+    try:
+        with open(_meta_path(path)) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return meta.get("input_hash") == input_hash and meta.get("stage") == stage.fingerprint
+
+
+def _write_meta(stage: Stage, path: str, input_hash: str):
+    with atomic_path(_meta_path(path)) as tmp_path:
+        with open(tmp_path, "w") as f:
+            json.dump({"stage": stage.fingerprint, "input_hash": input_hash}, f)
+
+
+def run_stage(stage: Stage, input_path: str, input_hash: Optional[str] = None) -> Optional[str]:
+    """
+    Produce the stage's artifact for input_path unless it is already up to date
+    Returns the artifact path, or None if the stage produced no output
+    (e.g. a video without an audio track)
+    Concurrent callers wait for the first one instead of duplicating work
+    """
+    input_hash = input_hash or file_fingerprint(input_path)
+    path = artifact_path(stage, input_hash)
+
+    if not _is_current(stage, path, input_hash):
+        with file_lock(os.path.join(os.path.dirname(path), f"{stage.name}.lock")):
+            # Another worker may have finished it while we waited
+            if not _is_current(stage, path, input_hash):
+                # Invalidate first, so a crash below can't leave an old tag on a new artifact
+                if os.path.exists(_meta_path(path)):
+                    os.remove(_meta_path(path))
+                if os.path.exists(path):
+                    os.remove(path)
+                with atomic_path(path) as tmp_path:
+                    stage.produce(input_path, tmp_path)
+                _write_meta(stage, path, input_hash)
+
+    return path if os.path.exists(path) else None
+
+
+def json_stage(name: str, version: Union[int, str], compute: Callable[[str], dict],
+               depends: Tuple[Stage, ...] = ()) -> Stage:
+    """
+    Stage whose artifact is the JSON result of compute(input_path)
+    """
+    def produce(input_path: str, output_path: str):
+        with open(output_path, "w") as f:
+            json.dump(compute(input_path), f)
+
+    return Stage(name=name, version=version, filename=f"{name}.json", produce=produce, depends=depends)
+
+
+def read_json_artifact(stage: Stage, input_hash: str) -> Optional[dict]:
+    """
+    The stage's stored JSON result for input_hash, or None if it is missing or stale
+    Never runs the stage
+    """
+    path = artifact_path(stage, input_hash)
+    if not _is_current(stage, path, input_hash):
+        return None
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def run_json_stage(stage: Stage, input_path: str, input_hash: Optional[str] = None) -> Optional[dict]:
+    path = run_stage(stage, input_path, input_hash)
+    if path is None:
+        return None
+    with open(path) as f:
+        return json.load(f)
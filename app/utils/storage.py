@@ -0,0 +1,336 @@
+import os
+import re
+import shutil
+import tempfile
+import threading
+import uuid
+from dataclasses import dataclass
+from typing import BinaryIO, Iterator, Optional
+
+try:
+    import boto3
+    from botocore.exceptions import ClientError
+    BOTO3_AVAILABLE = True
+except ImportError:
+    BOTO3_AVAILABLE = False
+
+CHUNK_SIZE = 1024 * 1024  # 1MB
+
+
+class StorageError(Exception):
+    """Raised when an object cannot be stored or read"""
+
+
+class ObjectNotFound(StorageError):
+    """Raised when a key does not exist"""
+
+
+@dataclass(frozen=True)
+class ObjectStat:
+    size: int
+    etag: str
+
+
+def upload_key(filename: str) -> str:
+    """
+    Storage key for an uploaded video
+    """
+    return f"uploads/{filename}"
+
+
+class LocalStorage:
+    """
+    Stores objects as files under a root directory
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, key: str) -> str:
+        full_path = os.path.abspath(os.path.join(self.root, key))
+        if not full_path.startswith(os.path.abspath(self.root) + os.sep):
+            raise StorageError(f"Invalid key: {key}")
+        return full_path
+
+    def put_stream(self, key: str, stream: BinaryIO) -> int:
+        """
+        Copy a file-like object into storage in chunks
+        Returns the number of bytes written
+        """
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file so readers never see a partial object
+        tmp_path = f"{path}.{uuid.uuid4().hex}.part"
+        written = 0
+        try:
+            with open(tmp_path, "wb") as f:
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+                    written += len(chunk)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return written
+
+    def get_range(self, key: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        """
+        Yield the bytes from start to end (inclusive) in chunks
+        """
+        path = self.path(key)
+        if not os.path.isfile(path):
+            raise ObjectNotFound(key)
+
+        def chunks():
+            with open(path, "rb") as f:
+                f.seek(start)
+                remaining = None if end is None else end - start + 1
+                while remaining is None or remaining > 0:
+                    chunk = f.read(CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        break
+                    if remaining is not None:
+                        remaining -= len(chunk)
+                    yield chunk
+
+        return chunks()
+
+    def stat(self, key: str) -> ObjectStat:
+        try:
+            result = os.stat(self.path(key))
+        except FileNotFoundError:
+            raise ObjectNotFound(key)
+        return ObjectStat(size=result.st_size, etag=f'"{result.st_mtime_ns:x}-{result.st_size:x}"')
+
+    def delete(self, key: str):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Direct filesystem path, so the read-through cache can skip copying"""
+        path = self.path(key)
+        return path if os.path.isfile(path) else None
+
+
+class S3Storage:
+    """
+    Stores objects in an S3-compatible bucket (AWS S3, MinIO, ...)
+    """
+
+    def __init__(self, bucket: str, endpoint_url: Optional[str] = None, prefix: str = "", client=None):
+        if client is None:
+            if not BOTO3_AVAILABLE:
+                raise StorageError("boto3 is required for S3 storage")
+            client = boto3.client("s3", endpoint_url=endpoint_url)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    def put_stream(self, key: str, stream: BinaryIO) -> int:
+        counter = _CountingReader(stream)
+        # upload_fileobj streams in multipart chunks without buffering the whole file
+        self.client.upload_fileobj(counter, self.bucket, self._key(key))
+        return counter.count
+
+    def get_range(self, key: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        params = {"Bucket": self.bucket, "Key": self._key(key)}
+        if start or end is not None:
+            params["Range"] = f"bytes={start}-" if end is None else f"bytes={start}-{end}"
+        try:
+            response = self.client.get_object(**params)
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("NoSuchKey", "404"):
+                raise ObjectNotFound(key)
+            raise StorageError(str(e))
+        return response["Body"].iter_chunks(CHUNK_SIZE)
+
+    def stat(self, key: str) -> ObjectStat:
+        try:
+            response = self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("NoSuchKey", "404"):
+                raise ObjectNotFound(key)
+            raise StorageError(str(e))
+        return ObjectStat(size=response["ContentLength"], etag=response["ETag"])
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def local_path(self, key: str) -> Optional[str]:
+        return None
+
+
+class _CountingReader:
+    """File-like wrapper that counts bytes read"""
+
+    def __init__(self, stream: BinaryIO):
+        self.stream = stream
+        self.count = 0
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self.stream.read(size)
+        self.count += len(chunk)
+        return chunk
+
+
+class LimitedReader:
+    """
+    File-like wrapper that raises StorageError once more than limit bytes are read
+    """
+
+    def __init__(self, stream: BinaryIO, limit: int):
+        self.stream = stream
+        self.limit = limit
+        self.count = 0
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self.stream.read(size)
+        self.count += len(chunk)
+        if self.count > self.limit:
+            raise StorageError("File exceeds size limit")
+        return chunk
+
+
+class ReadThroughCache:
+    """
+    Local copies of stored objects for processing stages that need a file path
+    Each object is downloaded once per worker host and reused by every stage
+    Least recently used copies are evicted beyond max_bytes
+    """
+
+    def __init__(self, storage, cache_dir: str, max_bytes: int = 2 * 1024 * 1024 * 1024):
+        self.storage = storage
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def local_path(self, key: str) -> str:
+        direct = self.storage.local_path(key)
+        if direct:
+            return direct
+
+        path = os.path.join(self.cache_dir, key)
+        if os.path.isfile(path):
+            os.utime(path)  # mark as recently used
+            return path
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.part"
+        try:
+            with open(tmp_path, "wb") as f:
+                for chunk in self.storage.get_range(key):
+                    f.write(chunk)
+            # Atomic, so concurrent downloads of the same key are harmless
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        self._evict()
+        return path
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            for root, dirs, files in os.walk(self.cache_dir):
+                for name in files:
+                    if name.endswith(".part"):
+                        continue
+                    full_path = os.path.join(root, name)
+                    try:
+                        result = os.stat(full_path)
+                    except FileNotFoundError:
+                        continue
+                    entries.append((result.st_mtime, result.st_size, full_path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, full_path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(full_path)
+                    total -= size
+                except FileNotFoundError:
+                    pass
+
+    def clear(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+
+def parse_range_header(range_header: Optional[str], size: int):
+    """
+    Parse a single-range "Range: bytes=..." header
+    Returns (start, end) inclusive, None if there is no usable header,
+    or raises ValueError if the range cannot be satisfied
+    """
+    if not range_header:
+        return None
+    match = re.fullmatch(r"\s*bytes=(\d*)-(\d*)\s*", range_header)
+    if not match or (not match.group(1) and not match.group(2)):
+        return None
+
+    if not match.group(1):
+        # Suffix range: the last N bytes
+        length = int(match.group(2))
+        if length == 0:
+            raise ValueError("Unsatisfiable range")
+        return max(0, size - length), size - 1
+
+    start = int(match.group(1))
+    end = int(match.group(2)) if match.group(2) else size - 1
+    if start >= size or end < start:
+        raise ValueError("Unsatisfiable range")
+    return start, min(end, size - 1)
+
+
+def create_storage_from_env():
+    """
+    Build the storage backend from STORAGE_BACKEND (local or s3)
+    """
+    backend = os.getenv("STORAGE_BACKEND", "local")
+    if backend == "s3":
+        return S3Storage(
+            bucket=os.environ["S3_BUCKET"],
+            endpoint_url=os.getenv("S3_ENDPOINT_URL"),
+            prefix=os.getenv("S3_PREFIX", "")
+        )
+    # Outside app/static, so uploads are only reachable through the ownership-checked /video route
+    return LocalStorage(os.getenv("LOCAL_STORAGE_ROOT", "data"))
+
+
+_storage = None
+_cache = None
+
+
+def get_storage():
+    """Return the active storage backend"""
+    global _storage
+    if _storage is None:
+        _storage = create_storage_from_env()
+    return _storage
+
+
+def get_cache() -> ReadThroughCache:
+    """Return the read-through cache for the active storage backend"""
+    global _cache
+    if _cache is None or _cache.storage is not get_storage():
+        _cache = ReadThroughCache(
+            get_storage(),
+            os.getenv("STORAGE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "psc-storage-cache"))
+        )
+    return _cache
+
+
+def set_storage(storage):
+    """Replace the active storage backend (e.g. in tests)"""
+    global _storage, _cache
+    _storage = storage
+    _cache = None
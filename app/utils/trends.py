@@ -0,0 +1,159 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models import RecordingMetrics, TrendRollup, Video
+
+# Metrics rolled up per period as <name>_sum / <name>_count
+TREND_METRICS = ("duration", "speaking_rate", "pause_ratio", "loudness_variance")
+
+
+def week_start(moment: Optional[datetime]) -> date:
+    """
+    Monday of the week containing moment
+    """
+    day = (moment or datetime.now(timezone.utc)).date()
+    return day - timedelta(days=day.weekday())
+
+
+def _ensure_rollup(db: Session, user_id: int, period_start: date):
+    """
+    Create the rollup row for a user/period if it does not exist yet
+    """
+    exists = db.query(TrendRollup.id).filter(
+        TrendRollup.user_id == user_id,
+        TrendRollup.period_start == period_start
+    ).first()
+    if exists:
+        return
+
+    # Another worker may create the same row concurrently
+    try:
+        with db.begin_nested():
+            db.add(TrendRollup(user_id=user_id, period_start=period_start))
+    except IntegrityError:
+        pass
+
+
+def _apply_to_rollup(db: Session, snapshot: RecordingMetrics, sign: int):
+    """
+    Add (sign=1) or remove (sign=-1) a recording's contribution to its rollup
+    """
+    changes = {
+        TrendRollup.recording_count: TrendRollup.recording_count + sign,
+        TrendRollup.note_count: TrendRollup.note_count + sign * (snapshot.note_count or 0)
+    }
+    for name in TREND_METRICS:
+        value = getattr(snapshot, name)
+        if value is None:
+            continue
+        sum_column = getattr(TrendRollup, f"{name}_sum")
+        count_column = getattr(TrendRollup, f"{name}_count")
+        changes[sum_column] = sum_column + sign * value
+        changes[count_column] = count_column + sign
+
+    db.query(TrendRollup).filter(
+        TrendRollup.user_id == snapshot.user_id,
+        TrendRollup.period_start == snapshot.period_start
+    ).update(changes, synchronize_session=False)
+
+
+def record_recording_metrics(db: Session, video: Video, metrics: dict):
+    """
+    Store a completed recording's metrics and fold them into the user's rollup
+    Reprocessing a video replaces its previous contribution
+    Call inside the transaction that marks the video completed
+    """
+    if video.user_id is None:
+        return
+
+    snapshot = db.query(RecordingMetrics).filter(RecordingMetrics.video_id == video.id).first()
+    if snapshot:
+        _apply_to_rollup(db, snapshot, -1)
+    else:
+        snapshot = RecordingMetrics(video_id=video.id)
+        db.add(snapshot)
+
+    snapshot.user_id = video.user_id
+    snapshot.recorded_at = video.uploaded_at
+    snapshot.period_start = week_start(video.uploaded_at)
+    snapshot.duration = video.duration
+    snapshot.speaking_rate = metrics.get("speaking_rate")
+    snapshot.pause_ratio = metrics.get("pause_ratio")
+    snapshot.loudness_variance = metrics.get("loudness_variance")
+    # Read the counter itself rather than video.note_count, which was loaded
+    # before notes saved while the video was processing
+    snapshot.note_count = db.query(Video.note_count).filter(Video.id == video.id).scalar() or 0
+    db.flush()
+
+    _ensure_rollup(db, snapshot.user_id, snapshot.period_start)
+    _apply_to_rollup(db, snapshot, 1)
+
+
+def record_note_for_trends(db: Session, video_id: int, delta: int = 1):
+    """
+    Count a note gaining content towards its recording's trend data
+    (delta=-1 for a note that was emptied)
+    Call inside the transaction that saves the note
+    """
+    snapshot = db.query(RecordingMetrics).filter(RecordingMetrics.video_id == video_id).first()
+    if not snapshot:
+        # Recording not processed yet; its note count is captured on completion
+        return
+
+    db.query(RecordingMetrics).filter(RecordingMetrics.video_id == video_id).update(
+        {RecordingMetrics.note_count: RecordingMetrics.note_count + delta},
+        synchronize_session=False
+    )
+    db.query(TrendRollup).filter(
+        TrendRollup.user_id == snapshot.user_id,
+        TrendRollup.period_start == snapshot.period_start
+    ).update(
+        {TrendRollup.note_count: TrendRollup.note_count + delta},
+        synchronize_session=False
+    )
+
+
+def get_trend_series(db: Session, user_id: int, granularity: str = "week") -> dict:
+    """
+    Return a user's metric series from the rollup tables
+    granularity is 'week' (averaged per week) or 'recording'
+    """
+    if granularity == "recording":
+        snapshots = db.query(RecordingMetrics).filter(
+            RecordingMetrics.user_id == user_id
+        ).order_by(RecordingMetrics.recorded_at, RecordingMetrics.video_id).all()
+        points = [{
+            "video_id": s.video_id,
+            "recorded_at": s.recorded_at.isoformat() if s.recorded_at else None,
+            "duration": s.duration,
+            "speaking_rate": s.speaking_rate,
+            "pause_ratio": s.pause_ratio,
+            "loudness_variance": s.loudness_variance,
+            "note_count": s.note_count
+        } for s in snapshots]
+        return {"granularity": granularity, "points": points}
+
+    if granularity != "week":
+        raise ValueError("granularity must be 'week' or 'recording'")
+
+    rollups = db.query(TrendRollup).filter(
+        TrendRollup.user_id == user_id,
+        TrendRollup.recording_count > 0
+    ).order_by(TrendRollup.period_start).all()
+
+    points = []
+    for rollup in rollups:
+        point = {
+            "period_start": rollup.period_start.isoformat(),
+            "recording_count": rollup.recording_count,
+            "note_count": rollup.note_count
+        }
+        for name in TREND_METRICS:
+            count = getattr(rollup, f"{name}_count")
+            point[name] = getattr(rollup, f"{name}_sum") / count if count else None
+        points.append(point)
+
+    return {"granularity": granularity, "points": points}
@@ -1,5 +1,7 @@
-import os
 import numpy as np
+from typing import Callable, Optional
+
+from app.utils.stages import Stage, json_stage, read_json_artifact, run_json_stage, run_stage
 
 try:
     from moviepy.video.io.VideoFileClip import VideoFileClip
@@ -15,10 +17,28 @@ except ImportError:
     LIBROSA_AVAILABLE = False
     print("Warning: librosa not available. Audio processing will be limited.")
 
-def process_video(file_path: str) -> float:
+def _write_audio(file_path: str, output_path: str):
+    video = VideoFileClip(file_path)
+    try:
+        if video.audio:
+            video.audio.write_audiofile(output_path, verbose=False, logger=None)
+    finally:
+        video.close()
+
+AUDIO_STAGE = Stage(name="audio", version=1, filename="audio.wav", produce=_write_audio)
+
+def extract_audio(file_path: str, input_hash: Optional[str] = None) -> Optional[str]:
+    """
+    Path of the video's extracted audio track, extracting it once per input
+    Returns None if the video has no audio
+    """
+    return run_stage(AUDIO_STAGE, file_path, input_hash)
+
+def process_video(file_path: str, progress: Optional[Callable] = None, input_hash: Optional[str] = None) -> float:
     """
     Process video file and extract basic information
     Returns video duration in seconds
+    If given, progress(stage, percent, data) is called as each step finishes
     """
     if not MOVIEPY_AVAILABLE:
         print("MoviePy not available, using file-based approach")
@@ -29,84 +49,130 @@ def process_video(file_path: str) -> float:
         # Load video file
         video = VideoFileClip(file_path)
         duration = video.duration
+        # Close video file to free memory
+        video.close()
+        if progress:
+            progress("duration", 30, {"duration": duration})
         
-        # Extract audio for future processing (skip for now if failing)
+        # Extract audio for the later stages (skip for now if failing)
         try:
-            audio_path = file_path.replace('.mp4', '_audio.wav')
-            if video.audio:
-                video.audio.write_audiofile(audio_path, verbose=False, logger=None)
+            audio_path = extract_audio(file_path, input_hash)
+            if progress:
+                progress("audio", 50, {"has_audio": audio_path is not None})
         except Exception as audio_error:
             print(f"Audio extraction failed: {audio_error}")
         
-        # Close video file to free memory
-        video.close()
-        
         return duration
         
     except Exception as e:
         print(f"Error processing video: {e}")
         return None  # Return None to let browser detect duration
 
-def extract_audio_features(file_path: str) -> dict:
+EMPTY_WAVEFORM = {
+    "waveform": [],
+    "time": [],
+    "sample_rate": 22050,
+    "duration": 0
+}
+
+def _waveform(file_path: str) -> dict:
+    audio_path = extract_audio(file_path)
+    if audio_path is None:
+        return EMPTY_WAVEFORM
+    
+    # Load audio with librosa
+    y, sr = librosa.load(audio_path)
+    
+    # Generate time axis
+    duration = len(y) / sr
+    time = np.linspace(0, duration, len(y))
+    
+    # Downsample for visualization (take every nth sample)
+    downsample_factor = max(1, len(y) // 1000)  # Limit to ~1000 points
+    y_downsampled = y[::downsample_factor]
+    time_downsampled = time[::downsample_factor]
+    
+    return {
+        "waveform": y_downsampled.tolist(),
+        "time": time_downsampled.tolist(),
+        "sample_rate": sr,
+        "duration": duration
+    }
+
+WAVEFORM_STAGE = json_stage("waveform", 1, _waveform, depends=(AUDIO_STAGE,))
+
+def extract_audio_features(file_path: str, input_hash: Optional[str] = None) -> dict:
     """
     Extract audio features for waveform visualization
     Returns dictionary with audio data
     """
     if not LIBROSA_AVAILABLE or not MOVIEPY_AVAILABLE:
         print("Audio processing libraries not available, returning empty data")
-        return {
-            "waveform": [],
-            "time": [],
-            "sample_rate": 22050,
-            "duration": 0
-        }
+        return dict(EMPTY_WAVEFORM)
     
     try:
-        # Get audio file path
-        audio_path = file_path.replace('.mp4', '_audio.wav')
-        
-        if not os.path.exists(audio_path):
-            # Extract audio if it doesn't exist
-            video = VideoFileClip(file_path)
-            if video.audio:
-                video.audio.write_audiofile(audio_path, verbose=False, logger=None)
-            video.close()
-        
-        if not os.path.exists(audio_path):
-            return {
-                "waveform": [],
-                "time": [],
-                "sample_rate": 22050,
-                "duration": 0
-            }
-        
-        # Load audio with librosa
-        y, sr = librosa.load(audio_path)
-        
-        # Generate time axis
-        duration = len(y) / sr
-        time = np.linspace(0, duration, len(y))
-        
-        # Downsample for visualization (take every nth sample)
-        downsample_factor = max(1, len(y) // 1000)  # Limit to ~1000 points
-        y_downsampled = y[::downsample_factor]
-        time_downsampled = time[::downsample_factor]
-        
-        return {
-            "waveform": y_downsampled.tolist(),
-            "time": time_downsampled.tolist(),
-            "sample_rate": sr,
-            "duration": duration
-        }
+        return run_json_stage(WAVEFORM_STAGE, file_path, input_hash)
         
     except Exception as e:
         print(f"Error extracting audio features: {e}")
-        return {
-            "waveform": [],
-            "time": [],
-            "sample_rate": 22050,
-            "duration": 0
-        }
+        return dict(EMPTY_WAVEFORM)
+
+def stored_waveform(input_hash: str) -> Optional[dict]:
+    """
+    Waveform computed earlier for this input, without recomputing it
+    """
+    return read_json_artifact(WAVEFORM_STAGE, input_hash)
+
+EMPTY_METRICS = {"loudness_mean": None, "loudness_variance": None, "pause_ratio": None, "speaking_rate": None}
+
+PAUSE_THRESHOLD_DB = -40.0
+
+def _audio_metrics(file_path: str, pause_threshold_db: float = PAUSE_THRESHOLD_DB) -> dict:
+    audio_path = extract_audio(file_path)
+    if audio_path is None:
+        return dict(EMPTY_METRICS)
+    
+    y, sr = librosa.load(audio_path)
+    if len(y) == 0:
+        return dict(EMPTY_METRICS)
+    
+    # Frame-level loudness relative to the loudest frame
+    rms = librosa.feature.rms(y=y)[0]
+    loudness = librosa.amplitude_to_db(rms, ref=np.max)
+    pause_ratio = float(np.mean(loudness < pause_threshold_db))
+    
+    # Onsets roughly track syllable nuclei; normalize by time spent speaking
+    onsets = librosa.onset.onset_detect(y=y, sr=sr, units="time")
+    speech_seconds = (len(y) / sr) * (1 - pause_ratio)
+    speaking_rate = float(len(onsets) / speech_seconds * 60) if speech_seconds > 0 else None
+    
+    return {
+        "loudness_mean": float(np.mean(loudness)),
+        "loudness_variance": float(np.var(loudness)),
+        "pause_ratio": pause_ratio,
+        "speaking_rate": speaking_rate
+    }
+
+METRICS_STAGE = json_stage("metrics", f"1-{PAUSE_THRESHOLD_DB}", _audio_metrics, depends=(AUDIO_STAGE,))
+
+def compute_audio_metrics(file_path: str, pause_threshold_db: float = PAUSE_THRESHOLD_DB,
+                          input_hash: Optional[str] = None) -> dict:
+    """
+    Compute summary metrics from the extracted audio track
+    Returns dictionary with loudness mean/variance (dB), pause ratio and
+    speaking rate (syllables per minute of speech, estimated from onsets)
+    """
+    if not LIBROSA_AVAILABLE or not MOVIEPY_AVAILABLE:
+        return dict(EMPTY_METRICS)
+    
+    try:
+        if pause_threshold_db != PAUSE_THRESHOLD_DB:
+            return _audio_metrics(file_path, pause_threshold_db)
+        return run_json_stage(METRICS_STAGE, file_path, input_hash)
+        
+    except Exception as e:
+        print(f"Error computing audio metrics: {e}")
+        return dict(EMPTY_METRICS)
 
 def get_video_info(file_path: str) -> dict:
     """
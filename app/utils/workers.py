@@ -0,0 +1,39 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+# CPU-heavy stages (frame analysis) run in separate processes so they
+# neither hold the GIL in the web worker nor block other uploads
+FRAME_ANALYSIS_WORKERS = int(os.getenv("FRAME_ANALYSIS_WORKERS", "2"))
+
+_pool = None
+_lock = threading.Lock()
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Return the shared process pool, starting it on first use"""
+    global _pool
+    with _lock:
+        # A child that died abruptly (OOM kill, crash in native code) breaks the
+        # pool for good; every later submit() would fail, so start a new one
+        if _pool is not None and _pool._broken:
+            print("Process pool is broken, restarting it")
+            _pool.shutdown(wait=False)
+            _pool = None
+        if _pool is None:
+            # spawn: forking a multi-threaded server process is unsafe
+            _pool = ProcessPoolExecutor(
+                max_workers=FRAME_ANALYSIS_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def shutdown_process_pool():
+    """Stop the process pool (called on application shutdown)"""
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+            _pool = None
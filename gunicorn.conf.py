@@ -0,0 +1,35 @@
+# Multi-worker production server: gunicorn -c gunicorn.conf.py app.main:app
+# Each worker is a uvicorn event loop, so async routes (SSE, range requests)
+# stay concurrent within a worker and CPU work spreads across workers.
+#
+# Requirements when running more than one worker:
+#   - SECRET_KEY must be set, otherwise each worker signs sessions with its own key
+#   - Frame analysis starts FRAME_ANALYSIS_WORKERS processes per web worker;
+#     keep workers * FRAME_ANALYSIS_WORKERS around the number of CPU cores
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+worker_class = "uvicorn_worker.UvicornWorker"
+# Fixed default: CPU counts seen inside a container are the host's, not its limit
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+
+# Uploads of up to 50MB over slow connections
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+
+# No max_requests: video processing runs in the worker that took the upload,
+# and recycling the worker would kill it mid-run. Runs cut short by a
+# redeploy are resumed by the other workers' stalled-processing sweep once
+# their processing lease lapses.
+
+accesslog = "-"
+errorlog = "-"
+
+
+def on_starting(server):
+    if not os.getenv("SECRET_KEY") and workers > 1:
+        raise RuntimeError(
+            "SECRET_KEY must be set when running more than one worker; "
+            "otherwise sessions are only valid on the worker that issued them"
+        )
@@ -0,0 +1,154 @@
+"""
+Load-testing scenarios for the public speaking coach
+
+Run against a local server, e.g.:
+    locust -f loadtest/locustfile.py --host http://localhost:8000 \
+        --headless -u 50 -r 5 -t 3m --csv loadtest/results/run
+
+Set LOADTEST_VIDEO to a real MP4 to exercise the full processing pipeline;
+otherwise a small placeholder file is uploaded (processing fails fast).
+Prints p50/p99 latency and throughput per endpoint when the run ends.
+"""
+import os
+import random
+import uuid
+
+from locust import HttpUser, between, events, task
+from locust.runners import WorkerRunner
+
+PASSWORD = "loadtest-password"
+RANGE_CHUNK = 256 * 1024
+# Default prompts seeded at startup
+PROMPT_IDS = list(range(1, 10))
+
+
+def _load_video() -> bytes:
+    path = os.getenv("LOADTEST_VIDEO")
+    if path:
+        with open(path, "rb") as f:
+            return f.read()
+    # Minimal "ftyp" box followed by padding; enough for upload and range requests
+    header = b"\x00\x00\x00\x18ftypmp42\x00\x00\x00\x00mp42isom"
+    return header + os.urandom(2 * 1024 * 1024 - len(header))
+
+
+VIDEO = _load_video()
+
+
+class Speaker(HttpUser):
+    """
+    A signed-in user reviewing their recordings: reading the analysis page,
+    autosaving notes while typing, scrubbing through the video and viewing reports
+    """
+    wait_time = between(1, 3)
+
+    def on_start(self):
+        self.videos = []
+        self.etags = {}
+        email = f"loadtest-{uuid.uuid4().hex[:12]}@example.com"
+        self.client.post(
+            "/register",
+            data={"email": email, "password": PASSWORD, "confirm_password": PASSWORD},
+            name="/register"
+        )
+        self.upload()
+
+    def _video_id(self):
+        return random.choice(self.videos) if self.videos else None
+
+    @task(1)
+    def upload(self):
+        with self.client.post(
+            "/upload",
+            files={"file": ("talk.mp4", VIDEO, "video/mp4")},
+            allow_redirects=False,
+            name="/upload",
+            catch_response=True
+        ) as response:
+            if response.status_code != 303:
+                response.failure(f"upload returned {response.status_code}")
+                return
+            self.videos.append(int(response.headers["location"].rsplit("/", 1)[1]))
+
+    @task(5)
+    def analysis_page(self):
+        video_id = self._video_id()
+        if video_id is None:
+            return
+        # Returning visitors revalidate with the ETag they already have
+        headers = {}
+        if video_id in self.etags and random.random() < 0.5:
+            headers["If-None-Match"] = self.etags[video_id]
+        with self.client.get(
+            f"/analysis/{video_id}", headers=headers, name="/analysis/[id]", catch_response=True
+        ) as response:
+            if response.status_code not in (200, 304):
+                response.failure(f"analysis returned {response.status_code}")
+                return
+            if response.headers.get("etag"):
+                self.etags[video_id] = response.headers["etag"]
+            response.success()
+
+    @task(3)
+    def note_autosave_burst(self):
+        video_id = self._video_id()
+        if video_id is None:
+            return
+        # Autosave fires repeatedly while the user types one answer
+        prompt_id = random.choice(PROMPT_IDS)
+        words = []
+        for _ in range(random.randint(3, 8)):
+            words.append(random.choice(["pace", "pause", "eye", "contact", "gesture", "volume", "clear"]))
+            self.client.post(
+                "/save_note",
+                data={"video_id": video_id, "prompt_id": prompt_id, "content": " ".join(words)},
+                name="/save_note"
+            )
+
+    @task(6)
+    def scrub_video(self):
+        video_id = self._video_id()
+        if video_id is None:
+            return
+        # Seeking around the player issues a series of range requests
+        for _ in range(random.randint(2, 6)):
+            start = random.randrange(0, max(1, len(VIDEO) - RANGE_CHUNK))
+            with self.client.get(
+                f"/video/{video_id}",
+                headers={"Range": f"bytes={start}-{start + RANGE_CHUNK - 1}"},
+                name="/video/[id] (range)",
+                catch_response=True
+            ) as response:
+                if response.status_code != 206:
+                    response.failure(f"range request returned {response.status_code}")
+
+    @task(2)
+    def report(self):
+        video_id = self._video_id()
+        if video_id is None:
+            return
+        self.client.get(f"/report/{video_id}", name="/report/[id]")
+
+    @task(1)
+    def dashboard(self):
+        self.client.get("/dashboard/videos", name="/dashboard/videos")
+
+
+@events.quitting.add_listener
+def print_endpoint_report(environment, **kwargs):
+    # Workers only hold their share; the master prints the aggregate
+    if isinstance(environment.runner, WorkerRunner):
+        return
+
+    stats = environment.stats
+    rows = sorted(stats.entries.values(), key=lambda entry: (entry.name, entry.method))
+    print()
+    print(f"{'Endpoint':<36}{'Reqs':>8}{'Fails':>7}{'Req/s':>9}{'p50 ms':>9}{'p99 ms':>9}")
+    for entry in rows + [stats.total]:
+        name = entry.name if entry is stats.total else f"{entry.method} {entry.name}"
+        print(
+            f"{name:<36}{entry.num_requests:>8}{entry.num_failures:>7}"
+            f"{entry.total_rps:>9.1f}"
+            f"{entry.get_response_time_percentile(0.5):>9.0f}"
+            f"{entry.get_response_time_percentile(0.99):>9.0f}"
+        )
@@ -3,47 +3,84 @@ from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
+import app.main as main
+from app import auth
 from app.main import app
 from app.database import Base, get_db
 from app.models import User
-from werkzeug.security import generate_password_hash
+from app.auth import hash_password
+from app.utils.search import create_search_indexes
 
 @pytest.fixture
-def client():
-    # Setup test database
-    SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+def db():
+    # In-memory database with the full schema, for tests of helpers that take a session
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    create_search_indexes(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+@pytest.fixture
+def user(db):
+    user = User(email="speaker@example.com")
+    db.add(user)
+    db.commit()
+    return user
+
+@pytest.fixture
+def session_local(tmp_path):
+    # Test database, used by the app through the get_db override and by fixtures directly
     engine = create_engine(
-        SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+        f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False}
     )
     TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    
+
     # Create tables
     Base.metadata.create_all(bind=engine)
+    create_search_indexes(engine)
+    yield TestingSessionLocal
+
+    # Cleanup
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+@pytest.fixture
+def client(session_local, tmp_path, monkeypatch):
+    # Startup seeding and background processing use the test database too
+    monkeypatch.setattr(main, "SessionLocal", session_local)
+    monkeypatch.setattr(main, "create_tables", lambda: None)
+    monkeypatch.setattr(main, "STARTUP_LOCK_PATH", str(tmp_path / "startup.lock"))
 
     # Override get_db dependency
     def override_get_db():
         try:
-            db = TestingSessionLocal()
+            db = session_local()
             yield db
         finally:
             db.close()
 
     app.dependency_overrides[get_db] = override_get_db
+    # Ids restart in every test database, so cached users from earlier tests would match
+    auth._user_cache.clear()
+    auth._video_cache.clear()
 
     with TestClient(app) as test_client:
         yield test_client
 
-    # Cleanup
-    Base.metadata.drop_all(bind=engine)
+    app.dependency_overrides.pop(get_db, None)
 
 @pytest.fixture
-def test_user(client):
+def test_user(session_local):
     # Create a test user
-    db = next(get_db())
+    db = session_local()
     user = User(
         email="test@example.com",
-        password_hash=generate_password_hash("testpassword")
+        password_hash=hash_password("testpassword")
     )
     db.add(user)
     db.commit()
-    return user
\ No newline at end of file
+    db.refresh(user)
+    db.close()
+    return user
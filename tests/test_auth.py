@@ -1,6 +1,8 @@
+import io
+
 import pytest
 from app.database import get_db
-from app.models import User
+from app.models import User, Video
 
 def test_user_registration(client):
     # Test successful registration
@@ -28,7 +30,7 @@ def test_user_login(client, test_user):
 
 def test_protected_route_access(client, test_user):
     # Test unauthorized access
-    response = client.get('/profile')
+    response = client.get('/profile', follow_redirects=False)
     assert response.status_code == 302  # Redirect to login
     
     # Test authorized access
@@ -37,4 +39,87 @@ def test_protected_route_access(client, test_user):
         'password': 'testpassword'
     })
     response = client.get('/profile')
-    assert response.status_code == 200
\ No newline at end of file
+    assert response.status_code == 200
+
+def test_session_token_round_trip():
+    from app.auth import create_session_token, verify_session_token
+    token = create_session_token(42)
+    assert verify_session_token(token) == 42
+
+def test_session_token_rejects_tampering_and_expiry():
+    from app.auth import create_session_token, verify_session_token
+    user_id, expires, signature = create_session_token(42).split(".")
+    assert verify_session_token(f"43.{expires}.{signature}") is None
+    assert verify_session_token(create_session_token(42, ttl=-1)) is None
+    assert verify_session_token("42") is None
+    assert verify_session_token(None) is None
+
+def test_session_token_rejects_non_ascii_signature():
+    from app.auth import create_session_token, verify_session_token
+    user_id, expires, signature = create_session_token(42).split(".")
+    assert verify_session_token(f"{user_id}.{expires}.é{signature[1:]}") is None
+
+def test_password_hashing():
+    from app.auth import hash_password, verify_password
+    password_hash = hash_password("securepassword123")
+    assert verify_password("securepassword123", password_hash)
+    assert not verify_password("wrong", password_hash)
+    assert not verify_password("securepassword123", None)
+
+def test_ttl_cache_expiry():
+    from app.utils.ttl_cache import TTLCache
+    now = [0.0]
+    cache = TTLCache(ttl=10, max_size=2, clock=lambda: now[0])
+    calls = []
+    loader = lambda: calls.append(1) or "user"
+
+    assert cache.get_or_load(1, loader) == "user"
+    assert cache.get_or_load(1, loader) == "user"
+    assert len(calls) == 1
+
+    now[0] = 11
+    assert cache.get_or_load(1, loader) == "user"
+    assert len(calls) == 2
+
+    cache.set(2, "b")
+    cache.set(3, "c")
+    assert cache.get(1) is None  # evicted beyond max_size
+    assert cache.get(None) is None
+
+def test_register_cookie_ownership_and_logout(client, test_user, session_local, tmp_path, monkeypatch):
+    from app.auth import SESSION_COOKIE
+    from app.utils import storage
+    monkeypatch.setattr(storage, "_storage", storage.LocalStorage(str(tmp_path / "storage")))
+    storage.get_storage().put_stream("uploads/mine.mp4", io.BytesIO(b"0123456789"))
+
+    # Registering signs the new user in
+    response = client.post('/register', data={
+        'email': 'new@example.com',
+        'password': 'securepassword123',
+        'confirm_password': 'securepassword123'
+    }, follow_redirects=False)
+    assert response.status_code == 303
+    assert SESSION_COOKIE in client.cookies
+
+    db = session_local()
+    new_user = db.query(User).filter(User.email == 'new@example.com').one()
+    mine = Video(filename="mine.mp4", user_id=new_user.id)
+    theirs = Video(filename="theirs.mp4", user_id=test_user.id)
+    db.add_all([mine, theirs])
+    db.commit()
+    mine_id, theirs_id = mine.id, theirs.id
+    db.close()
+
+    # The cookie grants access to the user's own videos only
+    response = client.get(f'/video/{mine_id}', headers={'Range': 'bytes=2-5'})
+    assert response.status_code == 206
+    assert response.content == b"2345"
+    assert client.get(f'/video/{theirs_id}').status_code == 403
+    assert client.get('/video/999').status_code == 404
+
+    # Logging out clears the cookie
+    response = client.get('/logout', follow_redirects=False)
+    assert response.status_code == 303
+    assert SESSION_COOKIE not in client.cookies
+    assert client.get(f'/video/{mine_id}').status_code == 403
+    assert client.get('/profile', follow_redirects=False).status_code == 302
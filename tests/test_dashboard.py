@@ -0,0 +1,129 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.exc import IntegrityError
+
+from app.models import User, Video, Prompt, Note
+from app.utils.dashboard import (
+    list_user_videos, encode_cursor, decode_cursor, get_profile_stats,
+    record_video_uploaded, record_video_completed, record_note_added
+)
+
+def add_videos(db, user, count, same_timestamp=False):
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    for i in range(count):
+        uploaded_at = start if same_timestamp else start + timedelta(minutes=i)
+        db.add(Video(filename=f"v{i}.mp4", original_name=f"v{i}.mp4", user_id=user.id, uploaded_at=uploaded_at))
+    db.commit()
+
+def test_cursor_round_trip():
+    uploaded_at = datetime(2025, 1, 1, 12, 30, 15, 123456)
+    assert decode_cursor(encode_cursor(uploaded_at, 42)) == (uploaded_at, 42)
+
+def test_invalid_cursor(db, user):
+    with pytest.raises(ValueError):
+        list_user_videos(db, user.id, cursor="not-a-cursor")
+
+@pytest.mark.parametrize("same_timestamp", [False, True])
+def test_keyset_pagination_visits_every_video_once(db, user, same_timestamp):
+    add_videos(db, user, 7, same_timestamp=same_timestamp)
+
+    seen, cursor = [], None
+    while True:
+        page = list_user_videos(db, user.id, limit=3, cursor=cursor)
+        seen.extend(video.id for video in page["videos"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert len(seen) == 7
+    assert len(set(seen)) == 7
+    assert seen == sorted(seen, reverse=True)
+
+def test_listing_is_scoped_to_user(db, user):
+    other = User(email="other@example.com")
+    db.add(other)
+    db.commit()
+    add_videos(db, other, 2)
+
+    assert list_user_videos(db, user.id)["videos"] == []
+
+def test_stats_maintained_on_write(db, user):
+    video = Video(filename="talk.mp4", user_id=user.id, duration=90.0)
+    db.add(video)
+    record_video_uploaded(db, user.id)
+    db.commit()
+
+    record_note_added(db, video.id)
+    record_note_added(db, video.id)
+    video.status = "completed"
+    record_video_completed(db, video)
+    db.commit()
+
+    db.refresh(video)
+    assert video.note_count == 2
+    assert get_profile_stats(db, user.id) == {
+        "video_count": 1,
+        "completed_video_count": 1,
+        "note_count": 2,
+        "total_duration": 90.0
+    }
+
+def test_notes_are_unique_per_prompt(db, user):
+    video = Video(filename="talk.mp4", user_id=user.id)
+    db.add(video)
+    db.commit()
+    db.add_all([Note(video_id=video.id, prompt_id=1, content="a"), Note(video_id=video.id, prompt_id=1, content="b")])
+    with pytest.raises(IntegrityError):
+        db.commit()
+
+def test_save_note_counts_only_notes_with_content(client, test_user, session_local):
+    session = session_local()
+    video = Video(filename="talk.mp4", user_id=test_user.id)
+    session.add(video)
+    session.commit()
+    # Seeded on startup
+    video_id, prompt_id = video.id, session.query(Prompt.id).first().id
+    session.close()
+
+    client.post('/login', data={'email': test_user.email, 'password': 'testpassword'})
+    counts = []
+    for content in ["", "slouching", "slouching less", "  "]:
+        response = client.post('/save_note', data={'video_id': video_id, 'prompt_id': prompt_id, 'content': content})
+        assert response.status_code == 200
+        session = session_local()
+        counts.append(session.get(Video, video_id).note_count)
+        assert session.query(Note).count() == 1
+        session.close()
+    assert counts == [0, 1, 1, 0]
+
+def test_save_note_is_one_transaction(client, test_user, session_local, monkeypatch):
+    import app.main as main
+    session = session_local()
+    video = Video(filename="talk.mp4", user_id=test_user.id)
+    session.add(video)
+    session.commit()
+    video_id, prompt_id = video.id, session.query(Prompt.id).first().id
+    session.close()
+
+    def locked(db, video_id, delta):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(main, "record_note_for_trends", locked)
+    client.post('/login', data={'email': test_user.email, 'password': 'testpassword'})
+    with pytest.raises(RuntimeError):
+        client.post('/save_note', data={'video_id': video_id, 'prompt_id': prompt_id, 'content': "slouching"})
+
+    # Neither the note nor the counters were written
+    session = session_local()
+    assert session.query(Note).count() == 0
+    assert session.get(Video, video_id).note_count == 0
+    session.close()
+
+def test_profile_page_loads_its_stylesheet(client, test_user):
+    import re
+    client.post('/login', data={'email': test_user.email, 'password': 'testpassword'})
+    page = client.get('/profile').text
+    href = re.search(r'href="([^"]*profile[^"]*\.css)"', page).group(1)
+    response = client.get(href)
+    assert response.status_code == 200
+    assert b".video-item" in response.content
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from app.utils.frame_analysis import (
+    analyze_frames,
+    build_timeline,
+    motion_energy,
+    sample_times,
+    summarize_timeline,
+)
+
+
+def test_sample_times():
+    assert list(sample_times(3, 1)) == [0.0, 1.0, 2.0]
+    assert list(sample_times(1, 2)) == [0.0, 0.5]
+    assert len(sample_times(0, 1)) == 0
+
+
+def test_motion_energy_without_previous_frame():
+    batch = np.stack([np.zeros((4, 4), np.uint8), np.full((4, 4), 255, np.uint8)])
+    assert list(motion_energy(batch, None)) == [0.0, 1.0]
+
+
+def test_motion_energy_continues_from_previous_batch():
+    previous = np.zeros((4, 4), np.uint8)
+    batch = np.stack([np.full((4, 4), 51, np.uint8), np.full((4, 4), 51, np.uint8)])
+    motion = motion_energy(batch, previous)
+    assert motion[0] == pytest.approx(0.2)
+    assert motion[1] == 0.0
+
+
+def test_build_timeline_groups_samples_per_second():
+    samples = [
+        {"t": 0.0, "motion": 0.1, "face": (0.5, 0.4, 0.2)},
+        {"t": 0.5, "motion": 0.3, "face": None},
+        {"t": 1.0, "motion": 0.0, "face": None},
+    ]
+    timeline = build_timeline(samples)
+    assert timeline["t"] == [0, 1]
+    assert timeline["motion"] == [0.2, 0.0]
+    assert timeline["face"] == [0.5, 0.0]
+    assert timeline["face_x"] == [0.5, None]
+
+    summary = summarize_timeline(timeline)
+    assert summary["face_presence"] == pytest.approx(0.25)
+    assert summary["max_motion"] == pytest.approx(0.2)
+
+
+def test_summarize_empty_timeline():
+    assert summarize_timeline(build_timeline([]))["face_presence"] is None
+
+
+def test_analyze_frames_on_synthetic_video(tmp_path):
+    cv2 = pytest.importorskip("cv2")
+    path = str(tmp_path / "moving.mp4")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), 10, (640, 360))
+    if not writer.isOpened():
+        pytest.skip("mp4v encoder not available")
+    for i in range(40):
+        frame = np.zeros((360, 640, 3), np.uint8)
+        x = 20 + i * 12
+        frame[100:200, x:x + 100] = 255
+        writer.write(frame)
+    writer.release()
+
+    result = analyze_frames(path, sample_rate=2, batch_size=3)
+    timeline = result["timeline"]
+    assert timeline["t"] == [0, 1, 2, 3]
+    assert result["summary"]["mean_motion"] > 0
+    assert result["summary"]["face_presence"] in (0, None)
+
+def test_broken_process_pool_is_replaced():
+    import os
+    from concurrent.futures.process import BrokenProcessPool
+    from app.utils.workers import get_process_pool, shutdown_process_pool
+    try:
+        # A child exiting abruptly, like an OOM kill
+        with pytest.raises(BrokenProcessPool):
+            get_process_pool().submit(os._exit, 1).result()
+        assert get_process_pool().submit(abs, -3).result() == 3
+    finally:
+        shutdown_process_pool()
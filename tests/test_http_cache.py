@@ -0,0 +1,66 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.utils.http_cache import (
+    AssetManifest, CachedStaticFiles, choose_encoding, etag_matches, page_etag,
+    IMMUTABLE_CACHE_CONTROL
+)
+
+@pytest.fixture
+def static_dir(tmp_path):
+    (tmp_path / "css").mkdir()
+    (tmp_path / "css" / "styles.css").write_text("body { color: #333; }\n" * 200)
+    (tmp_path / "uploads").mkdir()
+    (tmp_path / "uploads" / "talk.mp4").write_bytes(b"\x00" * 10)
+    return tmp_path
+
+@pytest.fixture
+def static_client(static_dir):
+    manifest = AssetManifest(str(static_dir))
+    app = FastAPI()
+    app.mount("/static", CachedStaticFiles(directory=str(static_dir), manifest=manifest), name="static")
+    return TestClient(app), manifest
+
+def test_manifest_fingerprints_assets_but_not_uploads(static_dir):
+    manifest = AssetManifest(str(static_dir))
+    assert manifest.url("css/styles.css").startswith("/static/css/styles.")
+    assert manifest.url("css/styles.css") != "/static/css/styles.css"
+    assert manifest.url("uploads/talk.mp4") == "/static/uploads/talk.mp4"
+
+def test_fingerprinted_asset_is_immutable_and_compressed(static_client):
+    client, manifest = static_client
+    response = client.get(manifest.url("css/styles.css"), headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.text.startswith("body")
+
+    etag = response.headers["etag"]
+    response = client.get(manifest.url("css/styles.css"), headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+def test_plain_asset_url_is_revalidated(static_client):
+    client, manifest = static_client
+    response = client.get("/static/css/styles.css")
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "no-cache"
+
+def test_choose_encoding():
+    available = {"gzip": b"", "br": b""}
+    assert choose_encoding("gzip, deflate, br", available) == "br"
+    assert choose_encoding("gzip, br;q=0", available) == "gzip"
+    assert choose_encoding("identity", available) is None
+
+def test_page_etag_changes_with_version():
+    first = page_etag("build", "analysis", 1, 1)
+    assert first == page_etag("build", "analysis", 1, 1)
+    assert first != page_etag("build", "analysis", 1, 2)
+    assert first != page_etag("other-build", "analysis", 1, 1)
+    assert etag_matches(f'"abc", {first}', first)
+    assert not etag_matches(None, first)
+
+def test_uploads_are_never_served(static_client):
+    client, manifest = static_client
+    assert client.get("/static/uploads/talk.mp4").status_code == 404
+    assert client.get("/static/css/../uploads/talk.mp4").status_code == 404
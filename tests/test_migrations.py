@@ -0,0 +1,64 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import IntegrityError
+
+from app.database import Base, migrate_schema
+from app.utils.search import create_search_indexes
+
+# Schema of the original database.db, before users, counters, transcripts etc.
+OLD_SCHEMA = [
+    """CREATE TABLE videos (id INTEGER NOT NULL, filename VARCHAR, original_name VARCHAR,
+       file_size INTEGER, duration FLOAT, uploaded_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+       status VARCHAR, PRIMARY KEY (id))""",
+    """CREATE TABLE prompts (id INTEGER NOT NULL, view_type VARCHAR, question_text TEXT,
+       order_index INTEGER, active BOOLEAN, PRIMARY KEY (id))""",
+    """CREATE TABLE notes (id INTEGER NOT NULL, video_id INTEGER, view_type VARCHAR, prompt_id INTEGER,
+       content TEXT, created_at DATETIME DEFAULT CURRENT_TIMESTAMP, PRIMARY KEY (id))""",
+    "INSERT INTO videos (id, filename, status) VALUES (1, 'v.mp4', 'completed')",
+    "INSERT INTO prompts (id, view_type, question_text, order_index, active) VALUES (1, 'video', 'Posture?', 1, 1)",
+    "INSERT INTO notes (id, video_id, view_type, prompt_id, content) VALUES (1, 1, 'video', 1, 'stale draft')",
+    "INSERT INTO notes (id, video_id, view_type, prompt_id, content) VALUES (2, 1, 'video', 1, 'slouching')",
+    "INSERT INTO notes (id, video_id, view_type, prompt_id, content) VALUES (3, 1, 'audio', 2, '')",
+]
+
+def upgrade(tmp_path, statements):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        for statement in statements:
+            conn.execute(text(statement))
+
+    for _ in range(2):  # every startup
+        Base.metadata.create_all(bind=engine)
+        migrate_schema(engine)
+        create_search_indexes(engine)
+    return engine
+
+def test_old_database_is_upgraded_in_place(tmp_path):
+    engine = upgrade(tmp_path, OLD_SCHEMA)
+
+    columns = {column["name"] for column in inspect(engine).get_columns("videos")}
+    assert {"user_id", "note_count", "transcript", "version", "input_hash", "processing_owner"} <= columns
+    with engine.begin() as conn:
+        assert conn.execute(text("SELECT note_count, version FROM videos")).one() == (1, 1)
+        # Duplicates from before the unique index keep the latest note; empty notes aren't counted
+        assert conn.execute(text("SELECT id FROM notes ORDER BY id")).all() == [(2,), (3,)]
+        assert conn.execute(text("SELECT rowid FROM notes_fts WHERE notes_fts MATCH 'slouch*'")).all() == [(2,)]
+
+def test_prompts_seeded_twice_are_merged(tmp_path):
+    engine = upgrade(tmp_path, OLD_SCHEMA[:3] + [
+        "INSERT INTO videos (id, filename, status) VALUES (1, 'a.mp4', 'completed'), (2, 'b.mp4', 'completed')",
+        # Two startups seeding at once
+        "INSERT INTO prompts (id, view_type, question_text, order_index) VALUES (1, 'video', 'Posture?', 1)",
+        "INSERT INTO prompts (id, view_type, question_text, order_index) VALUES (2, 'video', 'Posture?', 1)",
+        "INSERT INTO notes (id, video_id, prompt_id, content) VALUES (1, 1, 1, 'slouching')",
+        "INSERT INTO notes (id, video_id, prompt_id, content) VALUES (2, 1, 2, 'slouching too')",
+        "INSERT INTO notes (id, video_id, prompt_id, content) VALUES (3, 2, 2, 'upright')",
+    ])
+
+    with engine.begin() as conn:
+        assert conn.execute(text("SELECT id FROM prompts")).all() == [(1,)]
+        assert conn.execute(text("SELECT id, prompt_id FROM notes ORDER BY id")).all() == [(1, 1), (3, 1)]
+        assert conn.execute(text("SELECT note_count FROM videos ORDER BY id")).all() == [(1,), (1,)]
+    with pytest.raises(IntegrityError):
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO prompts (view_type, question_text, order_index) VALUES ('video', 'Again?', 1)"))
@@ -1,15 +1,16 @@
 import pytest
 from fastapi.testclient import TestClient
 from app.models import Video
-from app.database import get_db
 
 @pytest.fixture
-def test_video(client, test_user):
+def test_video(client, test_user, session_local):
     """Fixture to create a test video"""
-    db = next(get_db())
+    db = session_local()
     video = Video(filename="test_video.mp4", user_id=test_user.id)
     db.add(video)
     db.commit()
+    db.refresh(video)
+    db.close()
     return video
 
 def test_video_playback(client, test_user, test_video):
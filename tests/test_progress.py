@@ -0,0 +1,77 @@
+import asyncio
+import json
+import threading
+from app.utils.progress import ProgressBroker, format_sse
+
+def test_publish_replays_history_to_late_subscribers():
+    """Test that subscribers receive events published before they joined"""
+    broker = ProgressBroker()
+    broker.publish(1, "uploaded", 0)
+    broker.publish(1, "duration", 30, {"duration": 12.5})
+
+    async def collect():
+        queue = broker.subscribe(1)
+        return [queue.get_nowait(), queue.get_nowait()]
+
+    events = asyncio.run(collect())
+    assert [e["stage"] for e in events] == ["uploaded", "duration"]
+    assert events[1]["data"]["duration"] == 12.5
+
+def test_publish_from_worker_thread():
+    """Test that events published from a processing thread reach the event loop"""
+    broker = ProgressBroker()
+
+    async def run():
+        queue = broker.subscribe(2)
+        worker = threading.Thread(target=broker.publish, args=(2, "completed", 100))
+        worker.start()
+        event = await asyncio.wait_for(queue.get(), timeout=1)
+        worker.join()
+        broker.unsubscribe(2, queue)
+        return event
+
+    event = asyncio.run(run())
+    assert event["stage"] == "completed"
+    assert event["percent"] == 100
+
+def test_history_is_bounded():
+    """Test that only the most recently active videos are tracked"""
+    broker = ProgressBroker(max_tracked=2)
+    for video_id in range(3):
+        broker.publish(video_id, "uploaded", 0)
+    assert broker.history(0) == []
+    assert len(broker.history(2)) == 1
+
+def test_format_sse():
+    """Test Server-Sent Events message framing"""
+    message = format_sse({"video_id": 1, "stage": "metrics", "percent": 95, "data": {}})
+    assert message.startswith("event: metrics\ndata: ")
+    assert message.endswith("\n\n")
+    assert json.loads(message.split("data: ", 1)[1])["percent"] == 95
+
+def test_terminal_event_carries_stored_results(monkeypatch):
+    """Test that finished videos get their results from the database, not the broker history"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+    import app.main as main
+    from app.database import Base
+    from app.models import Video, RecordingMetrics, FrameTimeline
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(main, "SessionLocal", sessionmaker(bind=engine))
+    db = main.SessionLocal()
+    db.add(Video(id=1, filename="done.mp4", status="completed", duration=42.0))
+    db.add(Video(id=2, filename="busy.mp4", status="processing"))
+    db.add(RecordingMetrics(video_id=1, speaking_rate=150.0, pause_ratio=0.2, loudness_variance=30.0))
+    db.add(FrameTimeline(video_id=1, sample_rate=1.0, timeline={}, face_presence=0.9, mean_motion=0.05))
+    db.commit()
+    db.close()
+
+    event = main.load_terminal_event(1)
+    assert event["stage"] == "completed"
+    assert event["data"]["duration"] == 42.0
+    assert event["data"]["metrics"]["speaking_rate"] == 150.0
+    assert event["data"]["frames"] == {"face_presence": 0.9, "mean_motion": 0.05}
+    assert main.load_terminal_event(2) is None
@@ -0,0 +1,75 @@
+import pytest
+from sqlalchemy import text
+
+from app.models import User, Video, Note, Prompt
+from app.utils.search import create_search_indexes, build_match_query, search_notes
+
+@pytest.fixture
+def videos(db):
+    owner = User(email="owner@example.com")
+    other = User(email="other@example.com")
+    prompt = Prompt(view_type="video", question_text="Body language?", order_index=1)
+    hands_prompt = Prompt(view_type="video", question_text="Gestures?", order_index=2)
+    db.add_all([owner, other, prompt, hands_prompt])
+    db.commit()
+
+    mine = Video(filename="mine.mp4", original_name="Keynote", user_id=owner.id)
+    theirs = Video(filename="theirs.mp4", original_name="Pitch", user_id=other.id)
+    db.add_all([mine, theirs])
+    db.commit()
+
+    db.add_all([
+        Note(video_id=mine.id, prompt_id=prompt.id, view_type="video", content="Good eye contact with the audience"),
+        Note(video_id=mine.id, prompt_id=hands_prompt.id, view_type="video", content="Hands stayed in pockets"),
+        Note(video_id=theirs.id, prompt_id=prompt.id, view_type="video", content="Weak eye contact"),
+    ])
+    db.commit()
+    return owner, mine
+
+def test_build_match_query_escapes_syntax():
+    assert build_match_query('eye-contact "OR') == '"eye" "contact" "OR"*'
+    assert build_match_query("  ...  ") == ""
+
+def test_search_is_scoped_to_user(db, videos):
+    owner, mine = videos
+    results = search_notes(db, owner.id, "eye contact")
+    assert len(results) == 1
+    assert results[0]["video_id"] == mine.id
+    assert results[0]["prompt"] == "Body language?"
+    assert "<mark>eye</mark>" in results[0]["snippet"]
+
+def test_search_follows_note_updates(db, videos):
+    owner, mine = videos
+    note = db.query(Note).filter(Note.content.like("Hands%")).first()
+    note.content = "Gestures felt natural"
+    db.commit()
+
+    assert search_notes(db, owner.id, "pockets") == []
+    assert len(search_notes(db, owner.id, "gesture")) == 1  # stemmed and prefix-matched
+
+def test_search_transcripts(db, videos):
+    owner, mine = videos
+    mine.transcript = "Today I want to talk about <b>storytelling</b>"
+    db.commit()
+
+    results = search_notes(db, owner.id, "storytelling")
+    assert [r["type"] for r in results] == ["transcript"]
+    assert "&lt;b&gt;<mark>storytelling</mark>&lt;/b&gt;" in results[0]["snippet"]
+
+def test_notes_and_transcripts_are_ranked_separately(db, videos):
+    owner, mine = videos
+    mine.transcript = "Thank you, audience"
+    db.query(Note).filter(Note.content.like("Hands%")).first().content = "The audience looked bored"
+    db.commit()
+
+    results = search_notes(db, owner.id, "audience")
+    assert [r["type"] for r in results] == ["note", "transcript", "note"]
+    assert results[0]["score"] >= results[2]["score"]
+    assert len(search_notes(db, owner.id, "audience", limit=2)) == 2
+
+def test_existing_rows_are_indexed(db, videos):
+    owner, mine = videos
+    db.execute(text("DROP TABLE notes_fts"))
+    db.commit()
+    create_search_indexes(db.get_bind())
+    assert len(search_notes(db, owner.id, "pockets")) == 1
@@ -0,0 +1,168 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.models import User, Video
+from app.utils import stages
+from app.utils.processing_lock import claim_video, renew_claim, release_video, find_stalled_videos
+from app.utils.stages import Stage, atomic_path, json_stage, run_json_stage, run_stage
+
+@pytest.fixture(autouse=True)
+def artifact_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(stages, "ARTIFACT_DIR", str(tmp_path / "artifacts"))
+
+@pytest.fixture
+def video_file(tmp_path):
+    path = tmp_path / "talk.mp4"
+    path.write_bytes(b"video bytes")
+    return str(path)
+
+def counting_stage(calls, version=1, delay=0.0):
+    def produce(input_path, output_path):
+        calls.append(input_path)
+        time.sleep(delay)
+        with open(output_path, "w") as f:
+            f.write("artifact")
+    return Stage(name="copy", version=version, filename="copy.txt", produce=produce)
+
+def test_stage_is_skipped_when_up_to_date(video_file):
+    calls = []
+    first = run_stage(counting_stage(calls), video_file)
+    second = run_stage(counting_stage(calls), video_file)
+    assert first == second
+    assert open(first).read() == "artifact"
+    assert len(calls) == 1
+
+def test_version_or_input_change_reruns_stage(video_file):
+    calls = []
+    run_stage(counting_stage(calls), video_file)
+    run_stage(counting_stage(calls, version=2), video_file)
+    assert len(calls) == 2
+
+    # Different contents get their own artifact
+    with open(video_file, "wb") as f:
+        f.write(b"re-recorded")
+    run_stage(counting_stage(calls, version=2), video_file)
+    assert len(calls) == 3
+
+def test_dependency_version_is_part_of_the_tag(video_file):
+    calls = []
+    upstream_v1 = Stage(name="audio", version=1, filename="a.wav", produce=lambda i, o: None)
+    upstream_v2 = Stage(name="audio", version=2, filename="a.wav", produce=lambda i, o: None)
+    run_json_stage(json_stage("metrics", 1, lambda path: calls.append(path) or {}, depends=(upstream_v1,)), video_file)
+    run_json_stage(json_stage("metrics", 1, lambda path: calls.append(path) or {}, depends=(upstream_v2,)), video_file)
+    assert len(calls) == 2
+
+def test_failed_stage_leaves_no_artifact(video_file):
+    def produce(input_path, output_path):
+        with open(output_path, "w") as f:
+            f.write("partial")
+        raise RuntimeError("decoder crashed")
+
+    with pytest.raises(RuntimeError):
+        run_stage(Stage(name="copy", version=1, filename="copy.txt", produce=produce), video_file)
+
+    directory = os.path.dirname(stages.artifact_path(counting_stage([]), stages.file_fingerprint(video_file)))
+    assert [name for name in os.listdir(directory) if not name.endswith(".lock")] == []
+
+    calls = []
+    assert run_stage(counting_stage(calls), video_file) is not None
+    assert len(calls) == 1
+
+def test_stage_without_output_returns_none(video_file):
+    calls = []
+    stage = Stage(name="audio", version=1, filename="audio.wav", produce=lambda i, o: calls.append(i))
+    assert run_stage(stage, video_file) is None
+    assert run_stage(stage, video_file) is None
+    assert len(calls) == 1
+
+def test_concurrent_runs_produce_once(video_file):
+    calls = []
+    stage = counting_stage(calls, delay=0.2)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(run_stage(stage, video_file))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert len(set(results)) == 1
+
+def test_atomic_path_keeps_old_file_on_failure(tmp_path):
+    path = str(tmp_path / "result.json")
+    with open(path, "w") as f:
+        f.write("old")
+    with pytest.raises(ValueError):
+        with atomic_path(path) as tmp:
+            assert tmp.endswith(".json")
+            with open(tmp, "w") as f:
+                f.write("half")
+            raise ValueError()
+    assert open(path).read() == "old"
+    assert os.listdir(tmp_path) == ["result.json"]
+
+def test_processing_lock(db):
+    db.add(Video(id=1, filename="v.mp4"))
+    db.commit()
+
+    assert claim_video(db, 1, "worker-a")
+    assert not claim_video(db, 1, "worker-b")
+    release_video(db, 1, "worker-b")  # not the owner, no effect
+    assert not claim_video(db, 1, "worker-b")
+    release_video(db, 1, "worker-a")
+    assert claim_video(db, 1, "worker-b")
+
+    # Expired locks from crashed workers can be taken over
+    assert claim_video(db, 1, "worker-c", ttl=timedelta(seconds=-1)) is False
+    release_video(db, 1, "worker-b")
+    assert claim_video(db, 1, "worker-c", ttl=timedelta(seconds=-1))
+    assert claim_video(db, 1, "worker-d")
+    assert not claim_video(db, 99, "worker-a")
+
+    # Runs renew their lease; one that lost it to a takeover can't
+    assert renew_claim(db, 1, "worker-d")
+    assert not renew_claim(db, 1, "worker-c")
+
+def test_read_json_artifact_never_runs_the_stage(video_file):
+    calls = []
+    stage = json_stage("summary", 1, lambda path: calls.append(path) or {"words": 3})
+    input_hash = stages.file_fingerprint(video_file)
+    assert stages.read_json_artifact(stage, input_hash) is None
+    run_json_stage(stage, video_file)
+    assert stages.read_json_artifact(stage, input_hash) == {"words": 3}
+    assert stages.read_json_artifact(json_stage("summary", 2, lambda path: {}), input_hash) is None
+    assert len(calls) == 1
+
+def test_find_stalled_videos(db):
+    now = datetime.now(timezone.utc)
+    db.add_all([
+        Video(id=1, filename="just-uploaded.mp4", status="processing", uploaded_at=now),
+        Video(id=2, filename="lost-task.mp4", status="processing", uploaded_at=now - timedelta(hours=1)),
+        Video(id=3, filename="crashed.mp4", status="processing", uploaded_at=now - timedelta(hours=1),
+              processing_owner="dead-worker", processing_expires_at=now - timedelta(minutes=1)),
+        Video(id=4, filename="running.mp4", status="processing", uploaded_at=now - timedelta(hours=1),
+              processing_owner="live-worker", processing_expires_at=now + timedelta(minutes=10)),
+        Video(id=5, filename="done.mp4", status="completed", uploaded_at=now - timedelta(hours=1)),
+    ])
+    db.commit()
+    assert find_stalled_videos(db, now) == [(2, "lost-task.mp4"), (3, "crashed.mp4")]
+
+def test_video_completed_by_two_runs_is_counted_once(db, user):
+    from app.main import mark_video_completed
+    db.add(Video(id=1, filename="long.mp4", user_id=user.id, duration=1800.0, status="processing"))
+    db.commit()
+
+    # A slow run and the run that took over both loaded the video before either finished
+    runs = [sessionmaker(bind=db.get_bind())() for _ in range(2)]
+    videos = [session.get(Video, 1) for session in runs]
+    for session, video in zip(runs, videos):
+        mark_video_completed(session, video, "abc")
+        session.commit()
+        session.close()
+
+    user = db.query(User).one()
+    assert (user.completed_video_count, user.total_duration) == (1, 1800.0)
@@ -0,0 +1,46 @@
+import threading
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+import app.main as main
+from app.database import Base
+from app.models import Prompt
+
+@pytest.fixture
+def session_factory(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'startup.db'}", connect_args={"check_same_thread": False})
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(main, "SessionLocal", factory)
+    monkeypatch.setattr(main, "create_tables", lambda: Base.metadata.create_all(bind=engine))
+    monkeypatch.setattr(main, "STARTUP_LOCK_PATH", str(tmp_path / "startup.lock"))
+    return factory
+
+def test_concurrent_startup_seeds_prompts_once(session_factory):
+    threads = [threading.Thread(target=main.initialize_database) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    db = session_factory()
+    assert db.query(Prompt).count() == 9
+    db.close()
+
+def test_duplicate_prompts_are_rejected(session_factory):
+    main.initialize_database()
+    db = session_factory()
+    db.add(Prompt(view_type="video", question_text="Again?", order_index=1))
+    with pytest.raises(IntegrityError):
+        db.commit()
+    db.close()
+
+def test_stalled_videos_are_resumed(session_factory, monkeypatch):
+    main.initialize_database()
+    monkeypatch.setattr(main, "find_stalled_videos", lambda db: [(7, "crashed.mp4")])
+    resumed = []
+    monkeypatch.setattr(main, "run_processing", lambda video_id, key: resumed.append((video_id, key)))
+    main.resume_stalled_processing()
+    assert resumed == [(7, "uploads/crashed.mp4")]
@@ -0,0 +1,91 @@
+import io
+import pytest
+
+from app.utils.storage import (
+    LocalStorage, S3Storage, ReadThroughCache, LimitedReader, parse_range_header,
+    StorageError, ObjectNotFound
+)
+
+CONTENT = bytes(range(256)) * 8192  # 2MB, spans several chunks
+
+@pytest.fixture
+def local_storage(tmp_path):
+    return LocalStorage(str(tmp_path / "storage"))
+
+@pytest.fixture
+def s3_storage():
+    moto = pytest.importorskip("moto")
+    boto3 = pytest.importorskip("boto3")
+    with moto.mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket="recordings")
+        yield S3Storage("recordings", client=client)
+
+@pytest.fixture(params=["local", "s3"])
+def storage(request):
+    return request.getfixturevalue(f"{request.param}_storage")
+
+def test_put_stat_and_get_range(storage):
+    assert storage.put_stream("uploads/talk.mp4", io.BytesIO(CONTENT)) == len(CONTENT)
+    assert storage.stat("uploads/talk.mp4").size == len(CONTENT)
+    assert b"".join(storage.get_range("uploads/talk.mp4")) == CONTENT
+    assert b"".join(storage.get_range("uploads/talk.mp4", 1000, 1999)) == CONTENT[1000:2000]
+
+def test_missing_and_deleted_objects(storage):
+    with pytest.raises(ObjectNotFound):
+        storage.stat("uploads/missing.mp4")
+
+    storage.put_stream("uploads/talk.mp4", io.BytesIO(b"data"))
+    storage.delete("uploads/talk.mp4")
+    with pytest.raises(ObjectNotFound):
+        storage.stat("uploads/talk.mp4")
+
+def test_local_storage_rejects_path_traversal(local_storage):
+    with pytest.raises(StorageError):
+        local_storage.put_stream("../escape.mp4", io.BytesIO(b"data"))
+
+def test_read_through_cache_downloads_once(s3_storage, tmp_path):
+    s3_storage.put_stream("uploads/talk.mp4", io.BytesIO(CONTENT))
+    calls = []
+    get_range = s3_storage.get_range
+    s3_storage.get_range = lambda *args: calls.append(args) or get_range(*args)
+
+    cache = ReadThroughCache(s3_storage, str(tmp_path / "cache"))
+    path = cache.local_path("uploads/talk.mp4")
+    assert cache.local_path("uploads/talk.mp4") == path
+    assert len(calls) == 1
+    with open(path, "rb") as f:
+        assert f.read() == CONTENT
+
+def test_read_through_cache_uses_local_files_directly(local_storage, tmp_path):
+    local_storage.put_stream("uploads/talk.mp4", io.BytesIO(b"data"))
+    cache = ReadThroughCache(local_storage, str(tmp_path / "cache"))
+    assert cache.local_path("uploads/talk.mp4") == local_storage.path("uploads/talk.mp4")
+
+def test_read_through_cache_evicts_least_recently_used(s3_storage, tmp_path):
+    cache = ReadThroughCache(s3_storage, str(tmp_path / "cache"), max_bytes=len(CONTENT) + 1)
+    for name in ("a", "b"):
+        s3_storage.put_stream(f"uploads/{name}.mp4", io.BytesIO(CONTENT))
+        cache.local_path(f"uploads/{name}.mp4")
+    assert not (tmp_path / "cache" / "uploads" / "a.mp4").exists()
+    assert (tmp_path / "cache" / "uploads" / "b.mp4").exists()
+
+def test_limited_reader():
+    reader = LimitedReader(io.BytesIO(b"x" * 10), limit=5)
+    with pytest.raises(StorageError):
+        reader.read()
+
+@pytest.mark.parametrize("header,expected", [
+    ("bytes=0-999", (0, 999)),
+    ("bytes=500-", (500, 1999)),
+    ("bytes=-100", (1900, 1999)),
+    ("bytes=0-99999", (0, 1999)),
+    (None, None),
+    ("items=0-1", None),
+])
+def test_parse_range_header(header, expected):
+    assert parse_range_header(header, 2000) == expected
+
+def test_parse_unsatisfiable_range():
+    with pytest.raises(ValueError):
+        parse_range_header("bytes=2000-", 2000)
@@ -0,0 +1,72 @@
+import pytest
+from datetime import date, datetime, timezone
+
+from app.models import Video, TrendRollup
+from app.utils.trends import (
+    week_start, record_recording_metrics, record_note_for_trends, get_trend_series
+)
+
+def complete_video(db, user, day, duration, metrics):
+    video = Video(
+        filename=f"{day}-{duration}.mp4",
+        user_id=user.id,
+        duration=duration,
+        uploaded_at=datetime(2025, 3, day, tzinfo=timezone.utc)
+    )
+    db.add(video)
+    db.flush()
+    record_recording_metrics(db, video, metrics)
+    db.commit()
+    return video
+
+def test_week_start():
+    assert week_start(datetime(2025, 3, 6, 15, 0)) == date(2025, 3, 3)
+
+def test_weekly_rollup_averages(db, user):
+    complete_video(db, user, 3, 60.0, {"speaking_rate": 200.0, "pause_ratio": 0.2, "loudness_variance": 10.0})
+    complete_video(db, user, 5, 120.0, {"speaking_rate": 100.0, "pause_ratio": None, "loudness_variance": 20.0})
+    complete_video(db, user, 12, 30.0, {"speaking_rate": 150.0, "pause_ratio": 0.1, "loudness_variance": 5.0})
+
+    points = get_trend_series(db, user.id)["points"]
+    assert [p["period_start"] for p in points] == ["2025-03-03", "2025-03-10"]
+    assert points[0]["recording_count"] == 2
+    assert points[0]["duration"] == 90.0
+    assert points[0]["speaking_rate"] == 150.0
+    assert points[0]["pause_ratio"] == 0.2  # missing values are skipped
+    assert points[1]["loudness_variance"] == 5.0
+
+def test_reprocessing_replaces_contribution(db, user):
+    video = complete_video(db, user, 3, 60.0, {"speaking_rate": 200.0})
+    record_recording_metrics(db, video, {"speaking_rate": 120.0})
+    db.commit()
+
+    assert db.query(TrendRollup).count() == 1
+    point = get_trend_series(db, user.id)["points"][0]
+    assert point["recording_count"] == 1
+    assert point["speaking_rate"] == 120.0
+
+def test_notes_update_rollups(db, user):
+    video = complete_video(db, user, 3, 60.0, {})
+    record_note_for_trends(db, video.id)
+    record_note_for_trends(db, video.id)
+    db.commit()
+
+    assert get_trend_series(db, user.id)["points"][0]["note_count"] == 2
+    assert get_trend_series(db, user.id, granularity="recording")["points"][0]["note_count"] == 2
+
+def test_notes_saved_during_processing_are_counted(db, user):
+    video = Video(filename="talk.mp4", user_id=user.id, uploaded_at=datetime(2025, 3, 3, tzinfo=timezone.utc))
+    db.add(video)
+    db.commit()
+    assert video.note_count == 0
+
+    # Saved by another request while the video was processing; the loaded video is stale
+    db.query(Video).filter(Video.id == video.id).update({Video.note_count: 2}, synchronize_session=False)
+    record_recording_metrics(db, video, {})
+    db.commit()
+
+    assert get_trend_series(db, user.id)["points"][0]["note_count"] == 2
+
+def test_invalid_granularity(db, user):
+    with pytest.raises(ValueError):
+        get_trend_series(db, user.id, granularity="day")